@@ -69,7 +69,9 @@ class SmartAssistantProLearning(LearningAssistantMixin):
     def initialize_voice(self):
         """Initialize voice recognition and TTS"""
         try:
-            self.voice_handler = VoiceHandler()
+            self.voice_handler = VoiceHandler(
+                offline_model_path=self.config.get("voice", {}).get("offline_model_path") or None
+            )
             print("Voice system initialized successfully!")
         except Exception as e:
             print(f"Voice initialization failed: {e}")
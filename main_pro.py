@@ -47,7 +47,9 @@ class SmartAssistantPro:
     def initialize_voice(self):
         """Initialize voice recognition and TTS"""
         try:
-            self.voice_handler = VoiceHandler()
+            self.voice_handler = VoiceHandler(
+                offline_model_path=self.config.get("voice", {}).get("offline_model_path") or None
+            )
             print("Voice system initialized successfully!")
             
             if self.config.get("test_voice_on_startup", False):
@@ -6,29 +6,422 @@ Author: GitHub Copilot
 
 import os
 import sys
+import socket
 import psutil
 import platform
 import subprocess
+import shlex
 import time
 import json
 import glob
+import heapq
+import re
+import fnmatch
+import io
+import functools
+import itertools
+import importlib.util
+from collections import deque, namedtuple
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import pyautogui
-import pyperclip
-from PIL import Image
+from typing import Dict, List, Optional, Any, Callable, Tuple
 import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# pywin32 is only located here; the window and service methods import it on first use
+HAS_WINDOWS = importlib.util.find_spec("win32gui") is not None
+if not HAS_WINDOWS:
+    print("Windows-specific features disabled - pywin32 not available")
+
+HAS_WIN32SERVICE = importlib.util.find_spec("win32service") is not None
 
 try:
-    import win32api
-    import win32con
-    import win32gui
-    import win32process
-    import wmi
-    HAS_WINDOWS = True
+    import mss
+    HAS_MSS = True
 except ImportError:
-    HAS_WINDOWS = False
-    print("Windows-specific features disabled - pywin32/wmi not available")
+    HAS_MSS = False
+
+# psutil exposes the link-layer family as AF_LINK (AF_PACKET on Linux)
+AF_LINK = getattr(psutil, "AF_LINK", None)
+
+# Automation/clipboard modules are imported on first use: pyautogui alone
+# drags in tkinter and mouseinfo, which most system-info commands never need.
+_pyautogui = None
+_pyperclip = None
+_pil_image = None
+
+def _get_pyautogui():
+    """Import and configure pyautogui on first use."""
+    global _pyautogui
+    if _pyautogui is None:
+        import pyautogui
+        # PyAutoGUI safety settings
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0.1
+        _pyautogui = pyautogui
+    return _pyautogui
+
+def _get_pyperclip():
+    """Import pyperclip on first use."""
+    global _pyperclip
+    if _pyperclip is None:
+        import pyperclip
+        _pyperclip = pyperclip
+    return _pyperclip
+
+def _get_pil_image():
+    """Import PIL.Image on first use."""
+    global _pil_image
+    if _pil_image is None:
+        from PIL import Image
+        _pil_image = Image
+    return _pil_image
+
+_BYTE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+_BYTE_DIVISORS = tuple(float(1 << (10 * i)) for i in range(len(_BYTE_UNITS)))
+
+# Direct SendInput for clicks on Windows: one call for press + release,
+# instead of pyautogui's move/down/up sequence
+_send_input = None
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [
+            ("dx", wintypes.LONG),
+            ("dy", wintypes.LONG),
+            ("mouseData", wintypes.DWORD),
+            ("dwFlags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        ]
+
+    class _INPUT(ctypes.Structure):
+        # MOUSEINPUT is the largest member of the INPUT union, so it fixes the size
+        _fields_ = [("type", wintypes.DWORD), ("mi", _MOUSEINPUT)]
+
+    _INPUT_MOUSE = 0
+    _MOUSEEVENTF_MOVE = 0x0001
+    _MOUSEEVENTF_LEFTDOWN = 0x0002
+    _MOUSEEVENTF_LEFTUP = 0x0004
+    _MOUSEEVENTF_VIRTUALDESK = 0x4000
+    _MOUSEEVENTF_ABSOLUTE = 0x8000
+
+    # GetSystemMetrics indices for the bounds of the virtual desktop (all monitors)
+    _SM_XVIRTUALSCREEN = 76
+    _SM_YVIRTUALSCREEN = 77
+    _SM_CXVIRTUALSCREEN = 78
+    _SM_CYVIRTUALSCREEN = 79
+
+    try:
+        _send_input = ctypes.windll.user32.SendInput
+        _get_system_metrics = ctypes.windll.user32.GetSystemMetrics
+    except AttributeError:
+        _send_input = None
+
+# Static report headers, joined once at import. Table headers and row formats
+# start with a newline because the reports are written line by line into a buffer.
+_SYSINFO_HEADER = "🖥️ **System Information**"
+_PROC_SEP = "-" * 50
+_PROC_TABLE_HDR = "\n".join([
+    "\n\nTop 15 processes by CPU usage:",
+    "PID     | CPU%   | MEM%   | Name",
+    _PROC_SEP,
+])
+_PROC_ROW = "\n{:<7} | {:<6.1f} | {:<6.1f} | {}".format
+_SERVICE_TABLE_HDR = "\nName | State | Status | Start Mode\n" + "-" * 60
+_SERVICE_ROW = "\n{:<20} | {:<8} | {:<8} | {}".format
+
+# Seconds to reuse slow-changing hardware topology (e.g. mounted partitions)
+TOPOLOGY_CACHE_TTL = 30
+
+# Seconds between background refreshes of the live metrics snapshot
+METRICS_POLL_INTERVAL = 2
+
+# Seconds to reuse file search results for an identical (directory, pattern)
+SEARCH_CACHE_TTL = 30
+
+# Write buffer size for screenshot files
+SCREENSHOT_WRITE_BUFFER = 1 << 20
+
+# type_text pastes via the clipboard instead of typing beyond this many characters
+PASTE_THRESHOLD = 32
+
+# Seconds to leave the pasted text on the clipboard before restoring the old contents
+PASTE_RESTORE_DELAY = 0.25
+
+# CF_TEXT, CF_OEMTEXT, CF_UNICODETEXT and CF_LOCALE: the plain-text clipboard
+# formats, which pyperclip can save and restore
+_TEXT_CLIPBOARD_FORMATS = frozenset({1, 7, 13, 16})
+
+def _clipboard_holds_only_text(current_text: str) -> bool:
+    """Whether the clipboard can be saved and restored as text without losing anything.
+
+    On Windows the clipboard formats are checked directly; elsewhere only the
+    text is visible, so an empty result (which may hide an image or a file
+    list) counts as non-text.
+    """
+    if not HAS_WINDOWS:
+        return bool(current_text)
+    import win32clipboard
+    try:
+        win32clipboard.OpenClipboard()
+    except Exception:
+        # Another application holds the clipboard; don't risk overwriting it
+        return False
+    try:
+        clipboard_format = win32clipboard.EnumClipboardFormats(0)
+        while clipboard_format:
+            if clipboard_format not in _TEXT_CLIPBOARD_FORMATS:
+                return False
+            clipboard_format = win32clipboard.EnumClipboardFormats(clipboard_format)
+        return True
+    finally:
+        win32clipboard.CloseClipboard()
+
+# Seconds to reuse a WMI service snapshot between rapid repeat queries
+SERVICE_CACHE_TTL = 5
+_SERVICE_FIELDS = ["Name", "DisplayName", "State", "Status", "StartMode", "ProcessId"]
+_SERVICE_WQL = f"SELECT {', '.join(_SERVICE_FIELDS)} FROM Win32_Service"
+# wbemFlagReturnImmediately | wbemFlagForwardOnly: stream results instead of buffering them
+_WBEM_STREAM_FLAGS = 0x10 | 0x20
+
+def _wql_quote(value: str) -> str:
+    """Quote a string literal for a WQL WHERE clause."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+# Service query results, shaped like Win32_Service so the formatters are shared
+_ServiceRecord = namedtuple("_ServiceRecord", _SERVICE_FIELDS)
+_SCM_STATES = {
+    1: "Stopped", 2: "Start Pending", 3: "Stop Pending", 4: "Running",
+    5: "Continue Pending", 6: "Pause Pending", 7: "Paused",
+}
+_SCM_START_MODES = {0: "Boot", 1: "System", 2: "Auto", 3: "Manual", 4: "Disabled"}
+
+_FAILSAFE_MESSAGE = "❌ Automation aborted: PyAutoGUI fail-safe triggered (mouse moved to a screen corner)"
+
+def _command_safe(handler):
+    """Turn unexpected errors from a command handler into an error reply.
+
+    Individual methods only catch the failures they can explain; anything
+    else surfaces here, once per dispatch.
+    """
+    @functools.wraps(handler)
+    def wrapper(self, command: str, **kwargs) -> str:
+        try:
+            return handler(self, command, **kwargs)
+        except Exception as e:
+            return f"❌ Error executing command '{command}': {str(e)}"
+    return wrapper
+
+def _reply_on_error(action: str):
+    """Turn unexpected errors from a public screen/automation method into an error reply.
+
+    These methods are also called directly (and through their async wrappers),
+    so they cannot rely on handle_command's guard.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                return f"❌ Error {action}: {e}"
+        return wrapper
+    return decorate
+
+def _fixed_disk_partitions() -> list:
+    """List partitions, skipping optical and removable drives (empty ones stall disk_usage)."""
+    return [partition for partition in psutil.disk_partitions(all=False)
+            if "cdrom" not in partition.opts and "removable" not in partition.opts]
+
+def _disk_usage_or_none(partition):
+    """Get disk usage for a partition, or None if access is denied."""
+    try:
+        return psutil.disk_usage(partition.mountpoint)
+    except PermissionError:
+        return None
+
+_PATH_SEPARATORS = tuple({os.sep, os.altsep or os.sep, "/"})
+
+@functools.lru_cache(maxsize=64)
+def _compile_name_pattern(pattern: str):
+    """Compile a glob pattern for file names (case-insensitive on Windows, like glob)."""
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    return re.compile(fnmatch.translate(pattern), flags)
+
+def _find_files(directory: str, pattern: str, limit: int):
+    """Find up to limit paths matching pattern below directory.
+
+    Returns (matches, truncated), where truncated means more matches exist.
+    """
+    if any(sep in pattern for sep in _PATH_SEPARATORS):
+        # Patterns spanning directories need glob's path matching
+        found = glob.iglob(os.path.join(directory, "**", pattern), recursive=True)
+    else:
+        found = _scan_matching_names(directory, pattern)
+    
+    # Both walks are lazy, so they stop as soon as one result past the limit is seen
+    matches = tuple(itertools.islice(found, limit + 1))
+    return matches[:limit], len(matches) > limit
+
+def _scan_matching_names(directory: str, pattern: str):
+    """Yield paths below directory whose name matches a glob pattern.
+
+    Equivalent to glob's "<directory>/**/<pattern>", but walks with os.scandir
+    so entry types come from the directory listing instead of a stat per entry.
+    """
+    match = _compile_name_pattern(pattern).match
+    # Like glob, hidden entries are skipped unless the pattern asks for them
+    include_hidden = pattern.startswith(".")
+    
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") and not include_hidden:
+                    continue
+                if match(name):
+                    yield entry.path
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                except OSError:
+                    pass
+        # Visit subdirectories in listing order, depth first
+        pending.extend(reversed(subdirs))
+
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> Dict[str, Any]:
+    """Collect platform and hardware facts that cannot change while the process runs."""
+    cpu_freq = psutil.cpu_freq()
+    return {
+        "system": platform.system(),
+        "release": platform.release(),
+        "architecture": platform.architecture()[0],
+        "processor": platform.processor(),
+        "machine": platform.machine(),
+        "node": platform.node(),
+        "boot_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(psutil.boot_time())),
+        "cpu_count": psutil.cpu_count(logical=False),
+        "cpu_count_logical": psutil.cpu_count(logical=True),
+        "cpu_freq_max": cpu_freq.max if cpu_freq else None,
+    }
+
+# Help text is constant, so it is joined once at import
+_HELP_TEXT = "\n".join([
+    "🖥️ **Advanced Desktop Integration Commands**",
+    "",
+    "🔧 **System Information:**",
+    "• system_info - Get comprehensive system info",
+    "• hardware_info - Get detailed hardware info",
+    "• cpu_usage - Get current CPU usage",
+    "• memory_usage - Get current memory usage",
+    "• disk_usage - Get disk usage for all drives",
+    "• network_info - Get network information",
+    "• battery_status - Get battery status (laptops)",
+    "",
+    "⚙️ **Process Management:**",
+    "• list_processes - List running processes",
+    "• process_details(pid) - Get details for specific process",
+    "• kill_process(name/pid) - Kill a process",
+    "• start_program(path) - Start a program",
+    "",
+    "🪟 **Window Management (Windows only):**",
+    "• list_windows - List all open windows",
+    "• focus_window(title) - Focus a window",
+    "• close_window(title) - Close a window",
+    "• minimize_window(title) - Minimize a window",
+    "• maximize_window(title) - Maximize a window",
+    "",
+    "📁 **File Operations:**",
+    "• search_files(pattern) - Search for files",
+    "• clear_search_cache - Forget cached search results",
+    "• open_file(path) - Open a file",
+    "• create_folder(path) - Create a folder",
+    "• delete_file(path) - Delete a file",
+    "",
+    "📋 **Clipboard Operations:**",
+    "• get_clipboard - Get clipboard content",
+    "• set_clipboard(text) - Set clipboard content",
+    "• clipboard_history - Show clipboard history",
+    "",
+    "🖥️ **Screen & Automation:**",
+    "• take_screenshot - Take a screenshot",
+    "• screen_info - Get screen information",
+    "• type_text(text) - Type text",
+    "• click_at(x, y) - Click at coordinates",
+    "• press_key(key) - Press a key",
+    "",
+    "🔧 **Services (Windows only):**",
+    "• list_services - List Windows services",
+    "• service_status(name) - Get service status",
+])
+
+# Natural-language phrases for handle_command, highest priority first:
+# (phrase, method name, argument kind, message when the argument is missing).
+# A phrase inside a longer matched phrase yields to it regardless of priority.
+# Argument kinds: None takes no argument, "tail" passes the text after the
+# phrase, "last" passes the final word of the command.
+_COMMAND_PHRASES = (
+    # System Information Commands
+    ("system info", "get_system_info", None, None),
+    ("system information", "get_system_info", None, None),
+    ("hardware", "get_hardware_info", None, None),
+    ("cpu", "get_cpu_usage", None, None),
+    ("memory", "get_memory_usage", None, None),
+    ("disk", "get_disk_usage", None, None),
+    ("network", "get_network_info", None, None),
+    ("battery", "get_battery_status", None, None),
+    
+    # Process Management Commands
+    ("processes", "list_processes", None, None),
+    ("kill process", "kill_process", "last", "❌ Please specify process name or PID to kill"),
+    ("start program", "start_program", "tail", "❌ Please specify program path to start"),
+    
+    # Window Management Commands
+    ("windows list", "list_windows", None, None),
+    ("list windows", "list_windows", None, None),
+    ("focus window", "focus_window", "tail", "❌ Please specify window title to focus"),
+    ("close window", "close_window", "tail", "❌ Please specify window title to close"),
+    
+    # Clipboard Commands
+    ("clipboard set", "set_clipboard", "tail", "❌ Please specify text to set in clipboard"),
+    ("clipboard", "get_clipboard", None, None),
+    ("clipboard history", "get_clipboard_history", None, None),
+    
+    # Screen Commands
+    ("screenshot", "take_screenshot", None, None),
+    ("screen info", "get_screen_info", None, None),
+    
+    # Services Commands
+    ("services", "list_services", None, None),
+    ("service status", "get_service_status", "last", "❌ Please specify service name"),
+    
+    # File Operations
+    ("search files", "search_files", "tail", "❌ Please specify search pattern"),
+    ("open file", "open_file", "tail", "❌ Please specify file path to open"),
+)
+
+# Words the phrase matcher sees: runs of letters and digits, so punctuation
+# and the underscores in command names ("cpu_usage") separate words
+_COMMAND_WORD_RE = re.compile(r"[^\W_]+")
+
+# Plain substring tests for each phrase, in priority order, for commands where
+# a phrase only appears inside a longer word ("cpus", "harddisk")
+_COMMAND_SUBSTRING_RES = tuple(re.compile(re.escape(phrase), re.IGNORECASE)
+                               for phrase, _, _, _ in _COMMAND_PHRASES)
+
+# Automaton output for a phrase:
+# (priority, word count, handler, argument kind, missing-argument message)
+_CommandEntry = Tuple[int, int, Callable[..., str], Optional[str], Optional[str]]
 
 class AdvancedDesktopPlugin:
     """Advanced desktop integration with full PC control capabilities."""
@@ -39,17 +432,15 @@ class AdvancedDesktopPlugin:
         self.description = "Full desktop PC integration and control"
         self.enabled = True
         
-        # Initialize WMI connection for Windows
-        self.wmi_conn = None
-        if HAS_WINDOWS:
-            try:
-                self.wmi_conn = wmi.WMI()
-            except Exception as e:
-                print(f"WMI initialization failed: {e}")
+        # WMI connection for Windows, opened on first use of wmi_conn
+        # (only needed when the native Service Control Manager API is missing)
+        self._wmi_conn = None
+        self._wmi_attempted = False
         
-        # PyAutoGUI safety settings
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.1
+        # Reusable screen grabbers, one per thread: an mss instance holds
+        # thread-local display handles, and the async wrappers capture on a
+        # worker thread (see _get_sct)
+        self._sct_local = threading.local()
         
         # Command mappings
         self.commands = {
@@ -80,6 +471,7 @@ class AdvancedDesktopPlugin:
             "open_file": self.open_file,
             "create_folder": self.create_folder,
             "delete_file": self.delete_file,
+            "clear_search_cache": self.clear_search_cache,
             
             # Clipboard Operations
             "get_clipboard": self.get_clipboard,
@@ -100,21 +492,45 @@ class AdvancedDesktopPlugin:
             "service_status": self.get_service_status,
         }
         
+        # Command names for error payloads, built once
+        self._commands_tuple = tuple(self.commands)
+        
+        # Phrase matcher for handle_command, built once; agent loops repeat the
+        # same few commands, so resolved phrases are memoized per command
+        self._command_automaton = self._build_command_automaton()
+        self._resolve_command = functools.lru_cache(maxsize=256)(self._match_command)
+        
+        # Screen resolution, read once; see invalidate_screen_size()
+        self._screen_size = None
+        
+        # Bounded worker pool for the async screen/automation wrappers (created on first use)
+        self._executor = None
+        
+        # Live metrics snapshot, refreshed by a daemon thread started on first use
+        self._metrics_snapshot = None
+        self._metrics_lock = threading.Lock()
+        self._metrics_stop = threading.Event()
+        
+        # Short-lived cache for slow-changing system queries: key -> (timestamp, value)
+        self._ttl_cache = {}
+        
         # Clipboard history (simple implementation)
-        self.clipboard_history = []
+        # (newest first; the deque drops the oldest entry once full)
         self.max_clipboard_history = 50
+        self.clipboard_history = deque(maxlen=self.max_clipboard_history)
         
     def execute(self, command: str, **kwargs) -> Dict[str, Any]:
         """Execute a desktop command."""
         try:
-            if command not in self.commands:
+            handler = self.commands.get(command)
+            if handler is None:
                 return {
                     "success": False,
                     "error": f"Unknown command: {command}",
-                    "available_commands": list(self.commands.keys())
+                    "available_commands": self._commands_tuple
                 }
             
-            result = self.commands[command](**kwargs)
+            result = handler(**kwargs)
             return {
                 "success": True,
                 "command": command,
@@ -130,107 +546,105 @@ class AdvancedDesktopPlugin:
                 "timestamp": datetime.now().isoformat()
             }
 
+    @_command_safe
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle command in natural language format (for compatibility with demo)."""
-        try:
-            # Parse natural language commands to map to specific methods
-            command_lower = command.lower().strip()
-            
-            # System Information Commands
-            if "system info" in command_lower or "system information" in command_lower:
-                return self.get_system_info()
-            elif "hardware info" in command_lower or "hardware" in command_lower:
-                return self.get_hardware_info()
-            elif "cpu usage" in command_lower or "cpu" in command_lower:
-                return self.get_cpu_usage()
-            elif "memory usage" in command_lower or "memory" in command_lower:
-                return self.get_memory_usage()
-            elif "disk usage" in command_lower or "disk" in command_lower:
-                return self.get_disk_usage()
-            elif "network" in command_lower or "network status" in command_lower:
-                return self.get_network_info()
-            elif "battery" in command_lower:
-                return self.get_battery_status()
-            
-            # Process Management Commands
-            elif "processes" in command_lower or "list processes" in command_lower:
-                return self.list_processes()
-            elif "kill process" in command_lower:
-                parts = command_lower.split()
-                if len(parts) > 2:
-                    process_name = parts[-1]
-                    return self.kill_process(process_name)
-                return "❌ Please specify process name or PID to kill"
-            elif "start program" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    program_path = " ".join(parts[2:])
-                    return self.start_program(program_path)
-                return "❌ Please specify program path to start"
-            
-            # Window Management Commands
-            elif "windows list" in command_lower or "list windows" in command_lower:
-                return self.list_windows()
-            elif "focus window" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    window_title = " ".join(parts[2:])
-                    return self.focus_window(window_title)
-                return "❌ Please specify window title to focus"
-            elif "close window" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    window_title = " ".join(parts[2:])
-                    return self.close_window(window_title)
-                return "❌ Please specify window title to close"
-            
-            # Clipboard Commands
-            elif "clipboard set" in command_lower:
-                parts = command.split("set", 1)
-                if len(parts) > 1:
-                    text = parts[1].strip()
-                    return self.set_clipboard(text)
-                return "❌ Please specify text to set in clipboard"
-            elif "clipboard get" in command_lower or "clipboard" in command_lower:
-                return self.get_clipboard()
-            elif "clipboard history" in command_lower:
-                return self.get_clipboard_history()
-            
-            # Screen Commands
-            elif "screenshot" in command_lower:
-                return self.take_screenshot()
-            elif "screen info" in command_lower:
-                return self.get_screen_info()
-            
-            # Services Commands
-            elif "services" in command_lower or "list services" in command_lower:
-                return self.list_services()
-            elif "service status" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    service_name = parts[-1]
-                    return self.get_service_status(service_name)
-                return "❌ Please specify service name"
-            
-            # File Operations
-            elif "search files" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    pattern = " ".join(parts[2:])
-                    return self.search_files(pattern)
-                return "❌ Please specify search pattern"
-            elif "open file" in command_lower:
-                parts = command.split()
-                if len(parts) > 2:
-                    file_path = " ".join(parts[2:])
-                    return self.open_file(file_path)
-                return "❌ Please specify file path to open"
-            
-            else:
-                return f"❌ Unknown command: '{command}'\n\nUse 'help' to see available commands"
-                
-        except Exception as e:
-            return f"❌ Error executing command '{command}': {str(e)}"
+        # Parse natural language commands to map to specific methods
+        match = self._resolve_command(command)
+        if match is None:
+            return f"❌ Unknown command: '{command}'\n\nUse 'help' to see available commands"
+        
+        (_, _, handler, arg_kind, missing_message), end = match
+        if arg_kind is None:
+            return handler()
+        
+        # Everything after the phrase, keeping its spacing
+        argument = command[end:].strip()
+        if not argument:
+            return missing_message
+        if arg_kind == "last":
+            argument = argument.rsplit(None, 1)[-1]
+        return handler(argument)
+    
+    def _build_command_automaton(self) -> Tuple[List[Dict[str, int]], List[int], List[Optional[_CommandEntry]]]:
+        """Build a word-level Aho-Corasick automaton over _COMMAND_PHRASES.
+        
+        States are list indices: goto[state] maps the next word to a state,
+        fail[state] is the longest proper suffix state, and output[state] is the
+        longest phrase ending there as a _CommandEntry, or None.
+        """
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Optional[_CommandEntry]] = [None]
+        for priority, (phrase, method_name, arg_kind, missing_message) in enumerate(_COMMAND_PHRASES):
+            state = 0
+            phrase_words = phrase.split()
+            for word in phrase_words:
+                next_state = goto[state].get(word)
+                if next_state is None:
+                    next_state = goto[state][word] = len(goto)
+                    goto.append({})
+                    output.append(None)
+                state = next_state
+            if output[state] is None:
+                output[state] = (priority, len(phrase_words), getattr(self, method_name),
+                                 arg_kind, missing_message)
+        
+        # Breadth-first, so every fail target is complete before it is inherited from
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in goto[state].items():
+                target = fail[state]
+                while target and word not in goto[target]:
+                    target = fail[target]
+                target = fail[next_state] = goto[target].get(word, 0)
+                # A state's own phrase is longer than any suffix it could inherit
+                if output[next_state] is None:
+                    output[next_state] = output[target]
+                queue.append(next_state)
+        return goto, fail, output
+    
+    def _match_command(self, command: str) -> Optional[Tuple[_CommandEntry, int]]:
+        """Find the phrase to dispatch on, scanning the words in a single pass.
+        
+        Phrases inside a longer matched phrase are dropped ("clipboard" within
+        "clipboard history"); of the rest, the highest priority wins. When no
+        phrase matches whole words, the first phrase found anywhere in the
+        text is used instead.
+        Returns (automaton output, offset in command just past the phrase), or None.
+        """
+        goto, fail, output = self._command_automaton
+        hits = []
+        ends = []
+        state = 0
+        for pos, word_match in enumerate(_COMMAND_WORD_RE.finditer(command)):
+            word = word_match.group().lower()
+            ends.append(word_match.end())
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            entry = output[state]
+            if entry is not None:
+                hits.append((pos + 1 - entry[1], pos + 1, entry))
+        
+        best: Optional[Tuple[_CommandEntry, int]] = None
+        for start, end, entry in hits:
+            if any(other_start <= start and end <= other_end and other_end - other_start > end - start
+                   for other_start, other_end, _ in hits):
+                continue
+            if best is None or entry[0] < best[0][0]:
+                best = (entry, ends[end - 1])
+        if best is not None:
+            return best
+        
+        for priority, pattern in enumerate(_COMMAND_SUBSTRING_RES):
+            found = pattern.search(command)
+            if found:
+                phrase, method_name, arg_kind, missing_message = _COMMAND_PHRASES[priority]
+                return ((priority, len(phrase.split()), getattr(self, method_name),
+                         arg_kind, missing_message), found.end())
+        return None
     
     # System Information Methods
     def get_system_info(self) -> str:
@@ -238,15 +652,14 @@ class AdvancedDesktopPlugin:
         try:
             info = []
             
-            info.append("🖥️ **System Information**")
-            info.append(f"Platform: {platform.system()} {platform.release()}")
-            info.append(f"Architecture: {platform.architecture()[0]}")
-            info.append(f"Processor: {platform.processor()}")
-            info.append(f"Machine: {platform.machine()}")
-            info.append(f"Node: {platform.node()}")
-            
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
-            info.append(f"Boot Time: {boot_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            info.append(_SYSINFO_HEADER)
+            static = _static_system_info()
+            info.append(f"Platform: {static['system']} {static['release']}")
+            info.append(f"Architecture: {static['architecture']}")
+            info.append(f"Processor: {static['processor']}")
+            info.append(f"Machine: {static['machine']}")
+            info.append(f"Node: {static['node']}")
+            info.append(f"Boot Time: {static['boot_time']}")
             info.append(f"Current User: {os.getlogin()}")
             
             return "\n".join(info)
@@ -257,44 +670,41 @@ class AdvancedDesktopPlugin:
     def get_hardware_info(self) -> str:
         """Get detailed hardware information."""
         try:
-            info = []
-            info.append("🔧 **Hardware Information**")
+            buf = io.StringIO()
+            buf.write("🔧 **Hardware Information**")
             
             # CPU Information
-            cpu_count = psutil.cpu_count()
-            cpu_count_logical = psutil.cpu_count(logical=True)
+            static = _static_system_info()
             cpu_freq = psutil.cpu_freq()
             
-            info.append("\n**CPU:**")
-            info.append(f"Physical cores: {cpu_count}")
-            info.append(f"Total cores: {cpu_count_logical}")
+            buf.write("\n\n**CPU:**")
+            buf.write(f"\nPhysical cores: {static['cpu_count']}")
+            buf.write(f"\nTotal cores: {static['cpu_count_logical']}")
             if cpu_freq:
-                info.append(f"Max Frequency: {cpu_freq.max:.2f}Mhz")
-                info.append(f"Current Frequency: {cpu_freq.current:.2f}Mhz")
+                buf.write(f"\nMax Frequency: {static['cpu_freq_max']:.2f}Mhz")
+                buf.write(f"\nCurrent Frequency: {cpu_freq.current:.2f}Mhz")
             
             # Memory Information
             memory = psutil.virtual_memory()
-            info.append("\n**Memory:**")
-            info.append(f"Total: {self._bytes_to_human(memory.total)}")
-            info.append(f"Available: {self._bytes_to_human(memory.available)}")
-            info.append(f"Used: {self._bytes_to_human(memory.used)}")
-            info.append(f"Percentage: {memory.percent}%")
+            buf.write("\n\n**Memory:**")
+            buf.write(f"\nTotal: {self._bytes_to_human(memory.total)}")
+            buf.write(f"\nAvailable: {self._bytes_to_human(memory.available)}")
+            buf.write(f"\nUsed: {self._bytes_to_human(memory.used)}")
+            buf.write(f"\nPercentage: {memory.percent}%")
             
             # Disk Information
-            info.append("\n**Storage:**")
-            partitions = psutil.disk_partitions()
-            for partition in partitions:
-                try:
-                    partition_usage = psutil.disk_usage(partition.mountpoint)
-                    info.append(f"Drive {partition.device}")
-                    info.append(f"  Total: {self._bytes_to_human(partition_usage.total)}")
-                    info.append(f"  Used: {self._bytes_to_human(partition_usage.used)}")
-                    info.append(f"  Free: {self._bytes_to_human(partition_usage.free)}")
-                    info.append(f"  Percentage: {partition_usage.percent}%")
-                except PermissionError:
-                    info.append(f"Drive {partition.device}: Permission denied")
-            
-            return "\n".join(info)
+            buf.write("\n\n**Storage:**")
+            for partition, partition_usage in self._partition_usages():
+                if partition_usage is None:
+                    buf.write(f"\nDrive {partition.device}: Permission denied")
+                    continue
+                buf.write(f"\nDrive {partition.device}")
+                buf.write(f"\n  Total: {self._bytes_to_human(partition_usage.total)}")
+                buf.write(f"\n  Used: {self._bytes_to_human(partition_usage.used)}")
+                buf.write(f"\n  Free: {self._bytes_to_human(partition_usage.free)}")
+                buf.write(f"\n  Percentage: {partition_usage.percent}%")
+            
+            return buf.getvalue()
             
         except Exception as e:
             return f"❌ Error getting hardware info: {e}"
@@ -302,9 +712,12 @@ class AdvancedDesktopPlugin:
     def get_cpu_usage(self) -> str:
         """Get current CPU usage."""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            cpu_count_logical = psutil.cpu_count(logical=True)
+            metrics = self._metrics()
+            per_cpu = metrics['per_cpu']
+            cpu_percent = metrics['cpu_overall']
+            static = _static_system_info()
+            cpu_count = static['cpu_count']
+            cpu_count_logical = static['cpu_count_logical']
             
             info = []
             info.append("🔧 **CPU Usage**")
@@ -313,10 +726,8 @@ class AdvancedDesktopPlugin:
             info.append(f"Logical Cores: {cpu_count_logical}")
             
             # Per-core usage
-            per_cpu = psutil.cpu_percent(interval=1, percpu=True)
             info.append("\n**Per-Core Usage:**")
-            for i, usage in enumerate(per_cpu):
-                info.append(f"Core {i}: {usage}%")
+            info.extend(f"Core {i}: {usage}%" for i, usage in enumerate(per_cpu))
             
             return "\n".join(info)
             
@@ -326,8 +737,9 @@ class AdvancedDesktopPlugin:
     def get_memory_usage(self) -> str:
         """Get current memory usage."""
         try:
-            memory = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            metrics = self._metrics()
+            memory = metrics['memory']
+            swap = metrics['swap']
             
             info = []
             info.append("💾 **Memory Usage**")
@@ -354,18 +766,16 @@ class AdvancedDesktopPlugin:
             info = []
             info.append("💿 **Disk Usage**")
             
-            partitions = psutil.disk_partitions()
-            for partition in partitions:
-                try:
-                    partition_usage = psutil.disk_usage(partition.mountpoint)
-                    info.append(f"\n**Drive {partition.device}**")
-                    info.append(f"Filesystem: {partition.fstype}")
-                    info.append(f"Total: {self._bytes_to_human(partition_usage.total)}")
-                    info.append(f"Used: {self._bytes_to_human(partition_usage.used)}")
-                    info.append(f"Free: {self._bytes_to_human(partition_usage.free)}")
-                    info.append(f"Percentage: {partition_usage.percent}%")
-                except PermissionError:
+            for partition, partition_usage in self._partition_usages():
+                if partition_usage is None:
                     info.append(f"\n**Drive {partition.device}**: Permission denied")
+                    continue
+                info.append(f"\n**Drive {partition.device}**")
+                info.append(f"Filesystem: {partition.fstype}")
+                info.append(f"Total: {self._bytes_to_human(partition_usage.total)}")
+                info.append(f"Used: {self._bytes_to_human(partition_usage.used)}")
+                info.append(f"Free: {self._bytes_to_human(partition_usage.free)}")
+                info.append(f"Percentage: {partition_usage.percent}%")
             
             return "\n".join(info)
             
@@ -375,34 +785,35 @@ class AdvancedDesktopPlugin:
     def get_network_info(self) -> str:
         """Get network information."""
         try:
-            info = []
-            info.append("🌐 **Network Information**")
+            buf = io.StringIO()
+            buf.write("🌐 **Network Information**")
             
             # Network interfaces
-            interfaces = psutil.net_if_addrs()
-            info.append(f"\n**Network Interfaces ({len(interfaces)} found):**")
+            interfaces = self._net_if_addrs()
+            buf.write(f"\n\n**Network Interfaces ({len(interfaces)} found):**")
             
             for interface_name, interface_addresses in interfaces.items():
-                info.append(f"\n**{interface_name}:**")
+                buf.write(f"\n\n**{interface_name}:**")
                 for address in interface_addresses:
-                    if str(address.family) == 'AddressFamily.AF_INET':
-                        info.append(f"  IP Address: {address.address}")
-                        info.append(f"  Netmask: {address.netmask}")
-                        info.append(f"  Broadcast IP: {address.broadcast}")
-                    elif str(address.family) == 'AddressFamily.AF_PACKET':
-                        info.append(f"  MAC Address: {address.address}")
-                        info.append(f"  Netmask: {address.netmask}")
-                        info.append(f"  Broadcast MAC: {address.broadcast}")
+                    family = address.family
+                    if family == socket.AF_INET:
+                        buf.write(f"\n  IP Address: {address.address}")
+                        buf.write(f"\n  Netmask: {address.netmask}")
+                        buf.write(f"\n  Broadcast IP: {address.broadcast}")
+                    elif family == AF_LINK:
+                        buf.write(f"\n  MAC Address: {address.address}")
+                        buf.write(f"\n  Netmask: {address.netmask}")
+                        buf.write(f"\n  Broadcast MAC: {address.broadcast}")
             
             # Network statistics
-            net_io = psutil.net_io_counters()
-            info.append("\n**Network Statistics:**")
-            info.append(f"Bytes Sent: {self._bytes_to_human(net_io.bytes_sent)}")
-            info.append(f"Bytes Received: {self._bytes_to_human(net_io.bytes_recv)}")
-            info.append(f"Packets Sent: {net_io.packets_sent}")
-            info.append(f"Packets Received: {net_io.packets_recv}")
+            net_io = self._metrics()['net_io']
+            buf.write("\n\n**Network Statistics:**")
+            buf.write(f"\nBytes Sent: {self._bytes_to_human(net_io.bytes_sent)}")
+            buf.write(f"\nBytes Received: {self._bytes_to_human(net_io.bytes_recv)}")
+            buf.write(f"\nPackets Sent: {net_io.packets_sent}")
+            buf.write(f"\nPackets Received: {net_io.packets_recv}")
             
-            return "\n".join(info)
+            return buf.getvalue()
             
         except Exception as e:
             return f"❌ Error getting network info: {e}"
@@ -410,7 +821,7 @@ class AdvancedDesktopPlugin:
     def get_battery_status(self) -> str:
         """Get battery status."""
         try:
-            battery = psutil.sensors_battery()
+            battery = self._metrics()['battery']
             if battery is None:
                 return "🔌 No battery detected (Desktop PC or no battery sensor)"
             
@@ -436,31 +847,32 @@ class AdvancedDesktopPlugin:
     def list_processes(self) -> str:
         """List running processes."""
         try:
-            info = []
-            info.append("⚙️ **Running Processes**")
+            buf = io.StringIO()
+            buf.write("⚙️ **Running Processes**")
             
             processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
+            for proc in psutil.process_iter():
                 try:
-                    proc_info = proc.info
-                    proc_info['cpu_percent'] = proc.cpu_percent()
-                    processes.append(proc_info)
+                    # Read all attributes from one cached snapshot of the process;
+                    # ones we may not read show as 0.0 rather than None, which
+                    # the numeric row format would reject
+                    with proc.oneshot():
+                        processes.append(proc.as_dict(attrs=['pid', 'name', 'cpu_percent', 'memory_percent'],
+                                                      ad_value=0.0))
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
             
-            # Sort by CPU usage
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
+            # Only the top 15 by CPU usage are shown, so skip sorting the rest
+            top = heapq.nlargest(15, processes, key=lambda x: x['cpu_percent'] or 0)
             
-            info.append(f"\nTop 15 processes by CPU usage:")
-            info.append("PID     | CPU%   | MEM%   | Name")
-            info.append("-" * 50)
+            buf.write(_PROC_TABLE_HDR)
             
-            for proc in processes[:15]:
-                info.append(f"{proc['pid']:<7} | {proc['cpu_percent']:<6.1f} | {proc['memory_percent']:<6.1f} | {proc['name']}")
+            for proc in top:
+                buf.write(_PROC_ROW(proc['pid'], proc['cpu_percent'], proc['memory_percent'], proc['name']))
             
-            info.append(f"\nTotal processes: {len(processes)}")
+            buf.write(f"\n\nTotal processes: {len(processes)}")
             
-            return "\n".join(info)
+            return buf.getvalue()
             
         except Exception as e:
             return f"❌ Error listing processes: {e}"
@@ -473,17 +885,18 @@ class AdvancedDesktopPlugin:
             
             info = []
             info.append(f"🔍 **Process Details - PID {pid}**")
-            info.append(f"Name: {proc.name()}")
-            info.append(f"Status: {proc.status()}")
-            info.append(f"CPU Percent: {proc.cpu_percent()}%")
-            info.append(f"Memory Percent: {proc.memory_percent():.2f}%")
-            info.append(f"Memory Usage: {self._bytes_to_human(proc.memory_info().rss)}")
-            info.append(f"Create Time: {datetime.fromtimestamp(proc.create_time()).strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            try:
-                info.append(f"Command Line: {' '.join(proc.cmdline())}")
-            except psutil.AccessDenied:
-                info.append("Command Line: Access denied")
+            with proc.oneshot():
+                info.append(f"Name: {proc.name()}")
+                info.append(f"Status: {proc.status()}")
+                info.append(f"CPU Percent: {proc.cpu_percent()}%")
+                info.append(f"Memory Percent: {proc.memory_percent():.2f}%")
+                info.append(f"Memory Usage: {self._bytes_to_human(proc.memory_info().rss)}")
+                info.append(f"Create Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(proc.create_time()))}")
+                
+                try:
+                    info.append(f"Command Line: {' '.join(proc.cmdline())}")
+                except psutil.AccessDenied:
+                    info.append("Command Line: Access denied")
             
             return "\n".join(info)
             
@@ -529,8 +942,15 @@ class AdvancedDesktopPlugin:
     def start_program(self, program_path: str, args: str = "") -> str:
         """Start a program or application."""
         try:
-            command = f'"{program_path}" {args}'.strip()
-            process = subprocess.Popen(command, shell=True)
+            # Spawn the program directly, without an intermediate shell process
+            if os.name == "nt":
+                # CreateProcess parses the command line itself; keep the caller's argument quoting
+                command = subprocess.list2cmdline([program_path])
+                if args:
+                    command = f"{command} {args}"
+            else:
+                command = [program_path] + shlex.split(args)
+            process = subprocess.Popen(command, shell=False, start_new_session=True)
             
             return f"✅ Started program: {program_path} (PID: {process.pid})"
             
@@ -544,16 +964,20 @@ class AdvancedDesktopPlugin:
             return "❌ Window management only available on Windows"
         
         try:
+            import win32gui
+            import win32con
             windows = []
-            
-            def enum_windows_callback(hwnd, windows):
-                if win32gui.IsWindowVisible(hwnd):
-                    window_text = win32gui.GetWindowText(hwnd)
-                    if window_text:
-                        windows.append((hwnd, window_text))
+            append = windows.append
+            
+            def enum_windows_callback(hwnd, _):
+                # Cheap checks first: only fetch titles of visible, unowned, titled windows
+                if (win32gui.IsWindowVisible(hwnd)
+                        and win32gui.GetWindowTextLength(hwnd)
+                        and not win32gui.GetWindow(hwnd, win32con.GW_OWNER)):
+                    append((hwnd, win32gui.GetWindowText(hwnd)))
                 return True
             
-            win32gui.EnumWindows(enum_windows_callback, windows)
+            win32gui.EnumWindows(enum_windows_callback, None)
             
             info = [f"🪟 **Open Windows ({len(windows)} found)**"]
             
@@ -574,6 +998,7 @@ class AdvancedDesktopPlugin:
             return "❌ Window management only available on Windows"
         
         try:
+            import win32gui
             hwnd = win32gui.FindWindow(None, window_title)
             if hwnd == 0:
                 return f"❌ Window '{window_title}' not found"
@@ -590,6 +1015,8 @@ class AdvancedDesktopPlugin:
             return "❌ Window management only available on Windows"
         
         try:
+            import win32gui
+            import win32con
             hwnd = win32gui.FindWindow(None, window_title)
             if hwnd == 0:
                 return f"❌ Window '{window_title}' not found"
@@ -606,6 +1033,8 @@ class AdvancedDesktopPlugin:
             return "❌ Window management only available on Windows"
         
         try:
+            import win32gui
+            import win32con
             hwnd = win32gui.FindWindow(None, window_title)
             if hwnd == 0:
                 return f"❌ Window '{window_title}' not found"
@@ -622,6 +1051,8 @@ class AdvancedDesktopPlugin:
             return "❌ Window management only available on Windows"
         
         try:
+            import win32gui
+            import win32con
             hwnd = win32gui.FindWindow(None, window_title)
             if hwnd == 0:
                 return f"❌ Window '{window_title}' not found"
@@ -639,13 +1070,9 @@ class AdvancedDesktopPlugin:
             if directory is None:
                 directory = os.path.expanduser("~")
             
-            matches = []
-            search_pattern = os.path.join(directory, "**", pattern)
-            
-            for filepath in glob.glob(search_pattern, recursive=True):
-                matches.append(filepath)
-                if len(matches) >= 20:  # Limit results
-                    break
+            # Repeat searches (e.g. UI auto-refresh) reuse the previous walk for a short while
+            matches, truncated = self._cached(f"search:{directory}\0{pattern}", SEARCH_CACHE_TTL,
+                                              _find_files, directory, pattern, 20)
             
             info = []
             info.append(f"📁 **File Search Results for '{pattern}'**")
@@ -655,7 +1082,7 @@ class AdvancedDesktopPlugin:
             for match in matches:
                 info.append(f"  {match}")
             
-            if len(matches) >= 20:
+            if truncated:
                 info.append("... (showing first 20 results)")
             
             return "\n".join(info)
@@ -663,6 +1090,12 @@ class AdvancedDesktopPlugin:
         except Exception as e:
             return f"❌ Error searching files: {e}"
     
+    def clear_search_cache(self) -> str:
+        """Forget cached file search results."""
+        for key in [key for key in self._ttl_cache if key.startswith("search:")]:
+            del self._ttl_cache[key]
+        return "✅ File search cache cleared"
+    
     def open_file(self, file_path: str) -> str:
         """Open a file with the default application."""
         try:
@@ -700,14 +1133,13 @@ class AdvancedDesktopPlugin:
     def get_clipboard(self) -> str:
         """Get current clipboard content."""
         try:
-            content = pyperclip.paste()
+            content = _get_pyperclip().paste()
             if not content:
                 return "📋 Clipboard is empty"
             
             # Add to history
             if content not in self.clipboard_history:
-                self.clipboard_history.insert(0, content)
-                self.clipboard_history = self.clipboard_history[:self.max_clipboard_history]
+                self.clipboard_history.appendleft(content)
             
             return f"📋 **Clipboard Content:**\n{content}"
             
@@ -717,12 +1149,11 @@ class AdvancedDesktopPlugin:
     def set_clipboard(self, text: str) -> str:
         """Set clipboard content."""
         try:
-            pyperclip.copy(text)
+            _get_pyperclip().copy(text)
             
             # Add to history
             if text not in self.clipboard_history:
-                self.clipboard_history.insert(0, text)
-                self.clipboard_history = self.clipboard_history[:self.max_clipboard_history]
+                self.clipboard_history.appendleft(text)
             
             return f"✅ Set clipboard to: {text[:100]}{'...' if len(text) > 100 else ''}"
             
@@ -738,7 +1169,7 @@ class AdvancedDesktopPlugin:
             info = []
             info.append(f"📋 **Clipboard History ({len(self.clipboard_history)} items)**")
             
-            for i, item in enumerate(self.clipboard_history[:10], 1):
+            for i, item in enumerate(itertools.islice(self.clipboard_history, 10), 1):
                 preview = item[:50] + "..." if len(item) > 50 else item
                 info.append(f"{i}. {preview}")
             
@@ -751,101 +1182,235 @@ class AdvancedDesktopPlugin:
             return f"❌ Error getting clipboard history: {e}"
     
     # Screen Operations
-    def take_screenshot(self, filename: str = None) -> str:
-        """Take a screenshot."""
+    @_reply_on_error("taking screenshot")
+    def take_screenshot(self, filename: str = None, fast: bool = True) -> str:
+        """Take a screenshot. With fast=True, favour encode speed over file size."""
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Quick captures default to JPEG: far fewer bytes to encode and write
+            extension = "jpg" if fast else "png"
+            filename = f"screenshot_{timestamp}.{extension}"
+        
+        sct = self._get_sct()
+        if sct is not None:
+            # Decode the raw BGRA buffer straight into an RGB image
+            shot = sct.grab(sct.monitors[1])
+            screenshot = _get_pil_image().frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+        else:
+            screenshot = _get_pyautogui().screenshot()
+        
         try:
-            if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"screenshot_{timestamp}.png"
-            
-            screenshot = pyautogui.screenshot()
-            screenshot.save(filename)
-            
-            return f"📸 Screenshot saved: {filename}"
-            
-        except Exception as e:
-            return f"❌ Error taking screenshot: {e}"
+            # A 1 MiB buffer turns the encoder's many small writes into a few large ones
+            with open(filename, "wb", buffering=SCREENSHOT_WRITE_BUFFER) as output:
+                screenshot.save(output, **self._screenshot_save_options(filename, fast))
+        except OSError as e:
+            return f"❌ Error saving screenshot: {e}"
+        
+        return f"📸 Screenshot saved: {filename}"
+    
+    @_reply_on_error("capturing screen")
+    def take_screenshot_array(self):
+        """Capture the primary screen as an RGB numpy array (height x width x 3), without encoding.
+        
+        numpy is optional; like the other screen methods, failures are returned as an error message.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return "❌ Capturing the screen as an array requires numpy (pip install numpy)"
+        
+        sct = self._get_sct()
+        if sct is not None:
+            shot = sct.grab(sct.monitors[1])
+            # BGRA -> RGB in one strided copy
+            return np.ascontiguousarray(np.asarray(shot)[..., 2::-1])
+        return np.asarray(_get_pyautogui().screenshot().convert("RGB"))
+    
+    def _get_sct(self):
+        """Get this thread's mss screen grabber, created on first use; None if mss is unavailable."""
+        if not HAS_MSS:
+            return None
+        local = self._sct_local
+        if not hasattr(local, "sct"):
+            local.sct = None
+            try:
+                # Keeps the display handle open between captures on this thread
+                local.sct = mss.mss()
+            except Exception as e:
+                print(f"mss initialization failed: {e}")
+        return local.sct
+    
+    def _screenshot_save_options(self, filename: str, fast: bool) -> Dict[str, Any]:
+        """Get Pillow encoder options for the screenshot file type."""
+        if not fast:
+            return {}
+        
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".png":
+            # zlib level 1: several times faster than the default for a modest size increase
+            return {"format": "PNG", "compress_level": 1}
+        if ext in (".jpg", ".jpeg"):
+            return {"format": "JPEG", "quality": 80, "optimize": False, "progressive": False}
+        if ext == ".webp":
+            # method=0 is libwebp's fastest encoder preset
+            return {"format": "WEBP", "quality": 80, "method": 0}
+        return {}
     
+    @_reply_on_error("getting screen info")
     def get_screen_info(self) -> str:
         """Get screen information."""
-        try:
-            screen_size = pyautogui.size()
-            
-            info = []
-            info.append("🖥️ **Screen Information**")
-            info.append(f"Resolution: {screen_size.width} x {screen_size.height}")
-            
-            # Get current mouse position
-            mouse_pos = pyautogui.position()
-            info.append(f"Mouse Position: ({mouse_pos.x}, {mouse_pos.y})")
-            
-            return "\n".join(info)
-            
-        except Exception as e:
-            return f"❌ Error getting screen info: {e}"
+        screen_size = self._get_screen_size()
+        
+        info = []
+        info.append("🖥️ **Screen Information**")
+        info.append(f"Resolution: {screen_size.width} x {screen_size.height}")
+        
+        # Get current mouse position
+        mouse_pos = _get_pyautogui().position()
+        info.append(f"Mouse Position: ({mouse_pos.x}, {mouse_pos.y})")
+        
+        return "\n".join(info)
     
     # Automation Methods
-    def type_text(self, text: str) -> str:
-        """Type text at the current cursor position."""
+    @_reply_on_error("typing text")
+    def type_text(self, text: str, fast: bool = True) -> str:
+        """Type text at the current cursor position.
+        
+        With fast=True, long text is pasted through the clipboard, which is then
+        restored. The restore only covers text, so when the clipboard holds
+        anything else (an image, copied files, rich text) the text is typed
+        key by key instead.
+        """
+        pyautogui = _get_pyautogui()
         try:
-            pyautogui.typewrite(text)
-            return f"⌨️ Typed: {text[:50]}{'...' if len(text) > 50 else ''}"
-            
-        except Exception as e:
-            return f"❌ Error typing text: {e}"
+            pasted = False
+            if fast and len(text) > PASTE_THRESHOLD:
+                # One paste instead of a synthetic keystroke per character
+                pyperclip = _get_pyperclip()
+                previous = pyperclip.paste()
+                if _clipboard_holds_only_text(previous):
+                    pyperclip.copy(text)
+                    try:
+                        pyautogui.hotkey("command" if sys.platform == "darwin" else "ctrl", "v")
+                        # The target app reads the clipboard when it handles the
+                        # keystroke, which can be after hotkey() returns
+                        time.sleep(PASTE_RESTORE_DELAY)
+                    finally:
+                        pyperclip.copy(previous)
+                    pasted = True
+            if not pasted:
+                pyautogui.typewrite(text)
+        except pyautogui.FailSafeException:
+            return _FAILSAFE_MESSAGE
+        
+        return f"⌨️ Typed: {text[:50]}{'...' if len(text) > 50 else ''}"
     
+    @_reply_on_error("clicking")
     def click_at(self, x: int, y: int) -> str:
         """Click at specific coordinates."""
+        pyautogui = _get_pyautogui()
         try:
-            pyautogui.click(x, y)
-            return f"🖱️ Clicked at ({x}, {y})"
-            
-        except Exception as e:
-            return f"❌ Error clicking: {e}"
+            if _send_input is not None:
+                # SendInput bypasses pyautogui, so apply its fail-safe check here
+                pyautogui.failSafeCheck()
+                self._send_click(int(x), int(y))
+            else:
+                pyautogui.click(x, y)
+        except pyautogui.FailSafeException:
+            return _FAILSAFE_MESSAGE
+        
+        return f"🖱️ Clicked at ({x}, {y})"
+    
+    def _send_click(self, x: int, y: int) -> None:
+        """Left-click at (x, y) with a single SendInput call (Windows only)."""
+        # With VIRTUALDESK, absolute coordinates are normalised to 0..65535 across
+        # all monitors, so secondary screens and negative coordinates are reachable
+        left = _get_system_metrics(_SM_XVIRTUALSCREEN)
+        top = _get_system_metrics(_SM_YVIRTUALSCREEN)
+        width = _get_system_metrics(_SM_CXVIRTUALSCREEN)
+        height = _get_system_metrics(_SM_CYVIRTUALSCREEN)
+        dx = (x - left) * 65535 // max(width - 1, 1)
+        dy = (y - top) * 65535 // max(height - 1, 1)
+        flags = _MOUSEEVENTF_ABSOLUTE | _MOUSEEVENTF_VIRTUALDESK | _MOUSEEVENTF_MOVE
+        events = (_INPUT * 2)(
+            _INPUT(_INPUT_MOUSE, _MOUSEINPUT(dx, dy, 0, flags | _MOUSEEVENTF_LEFTDOWN, 0, 0)),
+            _INPUT(_INPUT_MOUSE, _MOUSEINPUT(dx, dy, 0, flags | _MOUSEEVENTF_LEFTUP, 0, 0)),
+        )
+        if _send_input(2, events, ctypes.sizeof(_INPUT)) != 2:
+            raise ctypes.WinError()
     
+    @_reply_on_error("pressing key")
     def press_key(self, key: str) -> str:
         """Press a specific key."""
+        pyautogui = _get_pyautogui()
         try:
             pyautogui.press(key)
-            return f"⌨️ Pressed key: {key}"
-            
-        except Exception as e:
-            return f"❌ Error pressing key: {e}"
+        except pyautogui.FailSafeException:
+            return _FAILSAFE_MESSAGE
+        
+        return f"⌨️ Pressed key: {key}"
+    
+    # Async wrappers: run the blocking capture/encode and input calls off the event loop
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking plugin method on the plugin's worker pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="desktop")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+    
+    async def atake_screenshot(self, filename: str = None, fast: bool = True) -> str:
+        """Async version of take_screenshot."""
+        return await self._run_blocking(self.take_screenshot, filename, fast)
+    
+    async def atype_text(self, text: str, fast: bool = True) -> str:
+        """Async version of type_text."""
+        return await self._run_blocking(self.type_text, text, fast)
+    
+    async def aclick_at(self, x: int, y: int) -> str:
+        """Async version of click_at."""
+        return await self._run_blocking(self.click_at, x, y)
+    
+    async def alist_services(self) -> str:
+        """Async version of list_services."""
+        return await self._run_blocking(self.list_services)
+    
+    async def aget_service_status(self, service_name: str) -> str:
+        """Async version of get_service_status."""
+        return await self._run_blocking(self.get_service_status, service_name)
     
     # Services Management (Windows only)
-    def list_services(self) -> str:
-        """List Windows services."""
-        if not HAS_WINDOWS or not self.wmi_conn:
-            return "❌ Service management only available on Windows with WMI"
+    def list_services(self, state: str = None) -> str:
+        """List Windows services, optionally only those in a given state (e.g. "Running")."""
+        if not HAS_WIN32SERVICE and not self.wmi_conn:
+            return "❌ Service management only available on Windows with pywin32 or WMI"
         
         try:
-            services = self.wmi_conn.Win32_Service()
+            services = self._cached(f"services:{(state or '').lower()}", SERVICE_CACHE_TTL,
+                                    self._query_services, state)
             
-            info = []
-            info.append(f"🔧 **Windows Services ({len(services)} found)**")
-            info.append("Name | State | Status | Start Mode")
-            info.append("-" * 60)
+            buf = io.StringIO()
+            buf.write(f"🔧 **Windows Services ({len(services)} found)**")
+            buf.write(_SERVICE_TABLE_HDR)
             
-            # Sort by name and show first 20
-            sorted_services = sorted(services, key=lambda x: x.Name)
-            for service in sorted_services[:20]:
-                info.append(f"{service.Name[:20]:<20} | {service.State:<8} | {service.Status:<8} | {service.StartMode}")
+            # Show the first 20 by name without sorting the whole list
+            for service in heapq.nsmallest(20, services, key=lambda s: s.Name):
+                buf.write(_SERVICE_ROW(service.Name[:20], service.State, service.Status, service.StartMode))
             
             if len(services) > 20:
-                info.append(f"... and {len(services) - 20} more services")
+                buf.write(f"\n... and {len(services) - 20} more services")
             
-            return "\n".join(info)
+            return buf.getvalue()
             
         except Exception as e:
             return f"❌ Error listing services: {e}"
     
     def get_service_status(self, service_name: str) -> str:
         """Get status of a specific Windows service."""
-        if not HAS_WINDOWS or not self.wmi_conn:
-            return "❌ Service management only available on Windows with WMI"
+        if not HAS_WIN32SERVICE and not self.wmi_conn:
+            return "❌ Service management only available on Windows with pywin32 or WMI"
         
         try:
-            services = self.wmi_conn.Win32_Service(Name=service_name)
+            services = self._cached(f"service:{service_name}", SERVICE_CACHE_TTL,
+                                    self._query_service, service_name)
             
             if not services:
                 return f"❌ Service '{service_name}' not found"
@@ -866,66 +1431,181 @@ class AdvancedDesktopPlugin:
         except Exception as e:
             return f"❌ Error getting service status: {e}"
     
+    def _query_services(self, state: str = None) -> list:
+        """Enumerate services, via the SCM when available, else WMI; filtered by state if given."""
+        if not HAS_WIN32SERVICE:
+            # Let WMI filter, so only matching rows cross the COM boundary
+            where = f" WHERE State = {_wql_quote(state)}" if state else ""
+            return self._wmi_service_records(_SERVICE_WQL + where)
+        
+        import win32service
+        scm = win32service.OpenSCManager(
+            None, None, win32service.SC_MANAGER_CONNECT | win32service.SC_MANAGER_ENUMERATE_SERVICE)
+        try:
+            entries = win32service.EnumServicesStatusEx(
+                scm, win32service.SERVICE_WIN32, win32service.SERVICE_STATE_ALL)
+            if state:
+                # Filter before the per-service config lookups in _scm_record
+                wanted = state.lower()
+                entries = [entry for entry in entries
+                           if _SCM_STATES.get(entry["CurrentState"], "Unknown").lower() == wanted]
+            return [self._scm_record(scm, entry["ServiceName"], entry["DisplayName"],
+                                     entry["CurrentState"], entry["ProcessId"])
+                    for entry in entries]
+        finally:
+            win32service.CloseServiceHandle(scm)
+    
+    def _query_service(self, service_name: str) -> list:
+        """Look up one service by name; returns an empty list if it does not exist."""
+        if not HAS_WIN32SERVICE:
+            return self._wmi_service_records(f"{_SERVICE_WQL} WHERE Name = {_wql_quote(service_name)}")
+        
+        import win32service
+        scm = win32service.OpenSCManager(None, None, win32service.SC_MANAGER_CONNECT)
+        try:
+            try:
+                handle = win32service.OpenService(scm, service_name, win32service.SERVICE_QUERY_STATUS)
+            except win32service.error:
+                return []
+            try:
+                status = win32service.QueryServiceStatusEx(handle)
+            finally:
+                win32service.CloseServiceHandle(handle)
+            return [self._scm_record(scm, service_name, None,
+                                     status["CurrentState"], status["ProcessId"])]
+        finally:
+            win32service.CloseServiceHandle(scm)
+    
+    def _wmi_service_records(self, wql: str) -> list:
+        """Run a Win32_Service query as a forward-only stream, copying each row into a record."""
+        # The SWbemServices enumerator yields objects as WMI produces them; reading the
+        # properties once per row avoids wrapping every service in a wmi proxy object
+        rows = self.wmi_conn.ExecQuery(wql, "WQL", _WBEM_STREAM_FLAGS)
+        return [_ServiceRecord(row.Name, row.DisplayName, row.State, row.Status,
+                               row.StartMode, row.ProcessId)
+                for row in rows]
+    
+    def _scm_record(self, scm, name: str, display_name: Optional[str], state: int, pid: int) -> _ServiceRecord:
+        """Build a Win32_Service-shaped record, reading the start mode from the service config."""
+        import win32service
+        start_mode = "Unknown"
+        try:
+            handle = win32service.OpenService(scm, name, win32service.SERVICE_QUERY_CONFIG)
+            try:
+                config = win32service.QueryServiceConfig(handle)
+            finally:
+                win32service.CloseServiceHandle(handle)
+            start_mode = _SCM_START_MODES.get(config[1], "Unknown")
+            display_name = display_name or config[8]
+        except win32service.error:
+            pass
+        
+        # The SCM has no equivalent of WMI's health Status column
+        return _ServiceRecord(name, display_name or name, _SCM_STATES.get(state, "Unknown"),
+                              "Unknown", start_mode, pid)
+    
     # Helper Methods
+    @property
+    def wmi_conn(self):
+        """WMI (SWbemServices) connection, created on first access; None if WMI is unavailable."""
+        if not self._wmi_attempted:
+            self._wmi_attempted = True
+            if HAS_WINDOWS:
+                try:
+                    import win32com.client
+                    self._wmi_conn = win32com.client.GetObject("winmgmts:")
+                except Exception as e:
+                    print(f"WMI initialization failed: {e}")
+        return self._wmi_conn
+    
+    def _cached(self, key: str, ttl: float, fn, *args):
+        """Return fn(*args), reusing the previous result for up to ttl seconds."""
+        now = time.monotonic()
+        entry = self._ttl_cache.get(key)
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+        value = fn(*args)
+        self._ttl_cache[key] = (now, value)
+        return value
+    
+    def _metrics(self) -> Dict[str, Any]:
+        """Get the latest metrics snapshot, starting the background poller on first use."""
+        snapshot = self._metrics_snapshot
+        if snapshot is None:
+            with self._metrics_lock:
+                if self._metrics_snapshot is None:
+                    # The first reading blocks for a real 1-second CPU sample
+                    self._metrics_snapshot = self._collect_metrics(cpu_interval=1)
+                    threading.Thread(target=self._poll_metrics, name="desktop-metrics",
+                                     daemon=True).start()
+                snapshot = self._metrics_snapshot
+        return snapshot
+    
+    def _collect_metrics(self, cpu_interval: Optional[float]) -> Dict[str, Any]:
+        """Sample CPU, memory, network counters and battery in one pass."""
+        per_cpu = psutil.cpu_percent(interval=cpu_interval, percpu=True)
+        return {
+            'per_cpu': per_cpu,
+            'cpu_overall': round(sum(per_cpu) / len(per_cpu), 1),
+            'memory': psutil.virtual_memory(),
+            'swap': psutil.swap_memory(),
+            'net_io': psutil.net_io_counters(),
+            'battery': psutil.sensors_battery(),
+        }
+    
+    def _poll_metrics(self) -> None:
+        """Refresh the metrics snapshot until stop_metrics_polling() is called."""
+        while not self._metrics_stop.wait(METRICS_POLL_INTERVAL):
+            try:
+                # interval=None measures CPU since the previous refresh, without blocking
+                self._metrics_snapshot = self._collect_metrics(cpu_interval=None)
+            except Exception as e:
+                print(f"Metrics polling failed: {e}")
+    
+    def stop_metrics_polling(self) -> None:
+        """Stop the background metrics thread."""
+        self._metrics_stop.set()
+    
+    def _get_screen_size(self):
+        """Get the screen resolution, querying the OS only on first use."""
+        if self._screen_size is None:
+            self._screen_size = _get_pyautogui().size()
+        return self._screen_size
+    
+    def invalidate_screen_size(self) -> None:
+        """Forget the cached resolution, e.g. after a display configuration change."""
+        self._screen_size = None
+    
+    def _disk_partitions(self) -> list:
+        """Get mounted fixed partitions; they only change on mount/unmount."""
+        return self._cached("disk_partitions", TOPOLOGY_CACHE_TTL, _fixed_disk_partitions)
+    
+    def _net_if_addrs(self) -> Dict[str, list]:
+        """Get interface addresses; they only change when adapters come and go."""
+        return self._cached("net_if_addrs", TOPOLOGY_CACHE_TTL, psutil.net_if_addrs)
+    
+    def _partition_usages(self) -> list:
+        """Get (partition, usage) pairs, usage None where access is denied.
+
+        disk_usage blocks on slow or sleeping drives, so the partitions are
+        queried concurrently and the total wait is the slowest drive, not the sum.
+        """
+        partitions = self._disk_partitions()
+        if len(partitions) <= 1:
+            return [(partition, _disk_usage_or_none(partition)) for partition in partitions]
+        with ThreadPoolExecutor(max_workers=min(4, len(partitions))) as pool:
+            return list(zip(partitions, pool.map(_disk_usage_or_none, partitions)))
+    
     def _bytes_to_human(self, bytes_value: int) -> str:
         """Convert bytes to human readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_value < 1024.0:
-                return f"{bytes_value:.2f} {unit}"
-            bytes_value /= 1024.0
-        return f"{bytes_value:.2f} PB"
+        bytes_value = int(bytes_value)
+        # Each unit is 2**10 larger, so the unit index is floor(log2(value)) // 10
+        index = 0 if bytes_value <= 0 else min(bytes_value.bit_length() - 1, 59) // 10
+        return f"{bytes_value / _BYTE_DIVISORS[index]:.2f} {_BYTE_UNITS[index]}"
     
     def get_help(self) -> str:
         """Get help information for the plugin."""
-        help_text = [
-            "🖥️ **Advanced Desktop Integration Commands**",
-            "",
-            "🔧 **System Information:**",
-            "• system_info - Get comprehensive system info",
-            "• hardware_info - Get detailed hardware info", 
-            "• cpu_usage - Get current CPU usage",
-            "• memory_usage - Get current memory usage",
-            "• disk_usage - Get disk usage for all drives",
-            "• network_info - Get network information",
-            "• battery_status - Get battery status (laptops)",
-            "",
-            "⚙️ **Process Management:**",
-            "• list_processes - List running processes",
-            "• process_details(pid) - Get details for specific process",
-            "• kill_process(name/pid) - Kill a process",
-            "• start_program(path) - Start a program",
-            "",
-            "🪟 **Window Management (Windows only):**",
-            "• list_windows - List all open windows",
-            "• focus_window(title) - Focus a window",
-            "• close_window(title) - Close a window",
-            "• minimize_window(title) - Minimize a window",
-            "• maximize_window(title) - Maximize a window",
-            "",
-            "📁 **File Operations:**",
-            "• search_files(pattern) - Search for files",
-            "• open_file(path) - Open a file",
-            "• create_folder(path) - Create a folder",
-            "• delete_file(path) - Delete a file",
-            "",
-            "📋 **Clipboard Operations:**",
-            "• get_clipboard - Get clipboard content",
-            "• set_clipboard(text) - Set clipboard content",
-            "• clipboard_history - Show clipboard history",
-            "",
-            "🖥️ **Screen & Automation:**",
-            "• take_screenshot - Take a screenshot",
-            "• screen_info - Get screen information",
-            "• type_text(text) - Type text",
-            "• click_at(x, y) - Click at coordinates",
-            "• press_key(key) - Press a key",
-            "",
-            "🔧 **Services (Windows only):**",
-            "• list_services - List Windows services",
-            "• service_status(name) - Get service status"
-        ]
-        
-        return "\n".join(help_text)
+        return _HELP_TEXT
 
 # Create plugin instance
 def create_plugin():
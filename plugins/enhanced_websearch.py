@@ -1,10 +1,22 @@
 import webbrowser
 import urllib.parse
+import ast
+import math
+import operator
+import functools
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+import lxml.html
+from lxml import etree
 import json
 import feedparser
 import time
+from itertools import islice
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import sys
 import os
@@ -13,6 +25,134 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from advanced_plugin_manager import BasePlugin
 import re
 
+# orjson decodes the larger API payloads (Reddit listings) noticeably faster;
+# both loaders accept the raw response bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+def _class_test(*names):
+    """XPath predicate matching elements whose class list contains any of the names."""
+    return " or ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+# Google result extraction, compiled once and evaluated by libxml2
+_GOOGLE_RESULT_XPATH = etree.XPath(f"//div[{_class_test('g')}]")
+_GOOGLE_TITLE_XPATH = etree.XPath("(.//h3)[1]")
+_GOOGLE_LINK_XPATH = etree.XPath("(.//a)[1]/@href", smart_strings=False)
+_GOOGLE_SNIPPET_XPATH = etree.XPath(f"(.//div[{_class_test('VwiC3b', 's3v9rd')}])[1]")
+_GOOGLE_DATE_XPATH = etree.XPath(f"(.//span[{_class_test('f')}])[1]")
+
+# Patterns used on every query, compiled once
+_STOCK_SYMBOL_RE = re.compile(r'\$([A-Z]{1,5})')
+_CALC_DISALLOWED_RE = re.compile(r'[^0-9+\-*/().\s]')
+_SIGNED_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+# Arithmetic the calculator understands; anything else in the parsed expression is rejected
+_CALC_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+_CALC_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_CALC_MAX_EXPONENT = 1000
+# Largest integer (in bits) any step may produce; nested powers whose exponents
+# are each within the cap can otherwise grow to hundreds of thousands of digits
+_CALC_MAX_RESULT_BITS = 10000
+
+def _eval_node(node):
+    """Evaluate a parsed arithmetic expression node"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _CALC_BINARY_OPS:
+        left, right = _eval_node(node.left), _eval_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            if abs(right) > _CALC_MAX_EXPONENT:
+                raise ValueError("Exponent too large")
+            # Estimate the size before computing it
+            if (isinstance(left, int) and abs(left) > 1 and right > 0 and
+                    right * math.log2(abs(left)) > _CALC_MAX_RESULT_BITS):
+                raise ValueError("Result too large")
+        result = _CALC_BINARY_OPS[type(node.op)](left, right)
+        if isinstance(result, int) and result.bit_length() > _CALC_MAX_RESULT_BITS:
+            raise ValueError("Result too large")
+        return result
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _CALC_UNARY_OPS:
+        return _CALC_UNARY_OPS[type(node.op)](_eval_node(node.operand))
+    raise ValueError("Unsupported expression")
+
+@functools.lru_cache(maxsize=256)
+def _evaluate_expression(expression: str):
+    """Evaluate an arithmetic expression without eval(); repeated expressions come from the cache"""
+    return _eval_node(ast.parse(expression, mode='eval').body)
+
+# Command words stripped by extract_query
+_QUERY_STOP_WORDS = frozenset([
+    "search", "google", "find", "news", "trending", "stock", "reddit",
+    "images", "videos", "maps", "instant", "realtime", "live", "for",
+    "about", "on", "of", "the", "and", "prices", "compare", "check"
+])
+# Matches any of them as a whole whitespace-delimited word, in one pass
+_QUERY_STOP_WORDS_RE = re.compile(
+    r'(?<!\S)(?:' + '|'.join(map(re.escape, sorted(_QUERY_STOP_WORDS, key=len, reverse=True))) + r')(?!\S)',
+    re.IGNORECASE)
+
+# Lifetimes (seconds) of cached lookups; repeated queries inside these windows
+# are answered without a network round-trip
+GOOGLE_CACHE_TTL = 300
+NEWS_CACHE_TTL = 120
+STOCK_CACHE_TTL = 30
+SUGGEST_CACHE_TTL = 3600
+SUGGESTION_COUNT = 5
+RESPONSE_CACHE_SIZE = 1024
+
+# Politeness limits per host: concurrent requests, and request starts per second
+HOST_MAX_CONCURRENT = 4
+HOST_REQUESTS_PER_SECOND = 5.0
+
+class HostRateLimiter:
+    """Caps concurrent requests per host and paces request starts with a token bucket"""
+    
+    def __init__(self, max_concurrent: int = HOST_MAX_CONCURRENT, rate: float = HOST_REQUESTS_PER_SECOND):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._buckets = {}  # host -> (tokens, time of last refill)
+    
+    @contextmanager
+    def slot(self, host: str):
+        """Hold one of the host's request slots, waiting for a slot and a token first"""
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrent)
+        with semaphore:
+            self._take_token(host)
+            yield
+    
+    def _take_token(self, host: str):
+        """Block until the host's bucket has a token, then spend it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.rate, now))
+                tokens = min(self.rate, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+
+# Shared by every plugin instance, since the limits are per remote host
+_HOST_LIMITER = HostRateLimiter()
+
 class EnhancedWebSearchPlugin(BasePlugin):
     def __init__(self):
         super().__init__()
@@ -32,9 +172,28 @@ class EnhancedWebSearchPlugin(BasePlugin):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            # Every encoding urllib3 can decode here: adds br when brotli is installed
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive'
         }
+        
+        # One pooled session for all lookups, so repeat hosts reuse their
+        # TCP/TLS connections; transient server errors are retried briefly
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                              max_retries=Retry(total=2, backoff_factor=0.3,
+                                                status_forcelist=(500, 502, 503, 504)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Validators of the last good download of each feed, for conditional GETs:
+        # url -> (ETag, Last-Modified, parsed feed)
+        self._feed_validators = {}
+        
+        # Recent lookup results: key -> (expiry, value), oldest first
+        self._cache = {}
+        self._cache_lock = threading.Lock()
     
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle enhanced web search commands"""
@@ -94,60 +253,99 @@ class EnhancedWebSearchPlugin(BasePlugin):
             webbrowser.open(search_url)
             
             # Format comprehensive response
-            response = f"🔍 **Enhanced Search Results for '{query}'**\n\n"
+            parts = [f"🔍 **Enhanced Search Results for '{query}'**\n\n"]
             
             if instant:
-                response += f"📋 **Instant Answer:** {instant}\n\n"
+                parts.append(f"📋 **Instant Answer:** {instant}\n\n")
             
             if results:
-                response += "🌐 **Top Search Results:**\n"
+                parts.append("🌐 **Top Search Results:**\n")
                 for i, result in enumerate(results[:5], 1):
-                    response += f"{i}. **{result['title']}**\n"
-                    response += f"   {result['snippet']}\n"
-                    response += f"   🔗 {result['url']}\n\n"
+                    parts.append(f"{i}. **{result['title']}**\n"
+                                 f"   {result['snippet']}\n"
+                                 f"   🔗 {result['url']}\n\n")
             
             if suggestions:
-                response += f"💡 **Related Searches:** {', '.join(suggestions[:5])}\n\n"
+                parts.append(f"💡 **Related Searches:** {', '.join(suggestions[:5])}\n\n")
             
-            response += f"🌐 Full search opened in browser"
-            return response
+            parts.append(f"🌐 Full search opened in browser")
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error in enhanced search: {e}"
     
+    def http_get(self, url: str, **kwargs):
+        """GET through the shared session, within the per-host rate limits"""
+        with _HOST_LIMITER.slot(urllib.parse.urlsplit(url).netloc):
+            return self.session.get(url, **kwargs)
+    
+    def cache_peek(self, key: tuple):
+        """Return the cached result for key if it is still fresh, else None"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+    
+    def cached(self, key: tuple, ttl: float, fetch, *args):
+        """Return the cached result for key, or call fetch(*args) and cache it.
+        
+        Empty results are not cached, so a failed lookup is retried next time.
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        
+        value = fetch(*args)
+        if value:
+            with self._cache_lock:
+                self._cache.pop(key, None)
+                self._cache[key] = (now + ttl, value)
+                if len(self._cache) > RESPONSE_CACHE_SIZE:
+                    del self._cache[next(iter(self._cache))]
+        return value
+    
     def scrape_google_results(self, query: str, num_results: int = 10) -> list:
         """Scrape Google search results with enhanced parsing"""
+        return self.cached(('google', query, num_results), GOOGLE_CACHE_TTL,
+                           self.fetch_google_results, query, num_results)
+    
+    def fetch_google_results(self, query: str, num_results: int = 10) -> list:
+        """Download and parse a Google results page"""
         try:
             encoded_query = urllib.parse.quote(query)
             search_url = f"https://www.google.com/search?q={encoded_query}&num={num_results}"
             
-            response = requests.get(search_url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self.http_get(search_url, timeout=10)
+            # lxml parses in C and detects the encoding from the raw bytes
+            document = lxml.html.fromstring(response.content)
             
             results = []
             
             # Enhanced result extraction
-            for result in soup.find_all('div', class_='g'):
+            for result in _GOOGLE_RESULT_XPATH(document):
                 try:
                     # Extract title
-                    title_elem = result.find('h3')
+                    title_elem = _GOOGLE_TITLE_XPATH(result)
                     if not title_elem:
                         continue
-                    title = title_elem.get_text()
+                    title = title_elem[0].text_content()
                     
                     # Extract URL
-                    link_elem = result.find('a')
-                    if not link_elem or not link_elem.get('href'):
+                    link = _GOOGLE_LINK_XPATH(result)
+                    if not link or not link[0]:
                         continue
-                    url = link_elem.get('href')
+                    url = link[0]
                     
                     # Extract snippet
-                    snippet_elem = result.find('div', class_=['VwiC3b', 's3v9rd'])
-                    snippet = snippet_elem.get_text() if snippet_elem else "No description available"
+                    snippet_elem = _GOOGLE_SNIPPET_XPATH(result)
+                    snippet = snippet_elem[0].text_content() if snippet_elem else "No description available"
                     
                     # Extract additional metadata
-                    date_elem = result.find('span', class_='f')
-                    date = date_elem.get_text() if date_elem else ""
+                    date_elem = _GOOGLE_DATE_XPATH(result)
+                    date = date_elem[0].text_content() if date_elem else ""
                     
                     results.append({
                         'title': title,
@@ -169,17 +367,23 @@ class EnhancedWebSearchPlugin(BasePlugin):
         """Get real-time news from multiple sources"""
         try:
             query = self.extract_query(command) if "about" in command else None
+            query_lower = query.lower() if query else None
             news_items = []
             
-            # Fetch from multiple RSS feeds
-            for source_url in self.news_sources:
+            # Fetch all RSS feeds concurrently, then read them in source order
+            with ThreadPoolExecutor(max_workers=len(self.news_sources)) as executor:
+                feeds = list(executor.map(self.get_feed, self.news_sources))
+            
+            for feed in feeds:
+                if feed is None:
+                    continue
                 try:
-                    feed = feedparser.parse(source_url)
                     source_name = feed.feed.title if hasattr(feed.feed, 'title') else "News Source"
                     
-                    for entry in feed.entries[:5]:  # Top 5 from each source
-                        # Filter by query if provided
-                        if query and query.lower() not in (entry.title + entry.summary).lower():
+                    for entry in islice(feed.entries, 5):  # Top 5 from each source
+                        # Filter by query if provided, before building anything for the entry
+                        if (query_lower and query_lower not in entry.title.lower()
+                                and query_lower not in entry.summary.lower()):
                             continue
                             
                         pub_date = entry.published if hasattr(entry, 'published') else "Recent"
@@ -199,19 +403,55 @@ class EnhancedWebSearchPlugin(BasePlugin):
             if not news_items:
                 return "❌ Could not fetch real-time news at the moment"
             
-            response = f"📰 **Real-Time News{f' about {query}' if query else ''}**\n\n"
+            parts = [f"📰 **Real-Time News{f' about {query}' if query else ''}**\n\n"]
             
             for i, item in enumerate(news_items, 1):
-                response += f"{i}. **{item['title']}**\n"
-                response += f"   📰 {item['source']} | 📅 {item['date']}\n"
-                response += f"   {item['summary']}\n"
-                response += f"   🔗 {item['link']}\n\n"
+                parts.append(f"{i}. **{item['title']}**\n"
+                             f"   📰 {item['source']} | 📅 {item['date']}\n"
+                             f"   {item['summary']}\n"
+                             f"   🔗 {item['link']}\n\n")
             
-            return response
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error fetching news: {e}"
     
+    def get_feed(self, source_url: str):
+        """Get one parsed RSS feed, reusing a recent download"""
+        return self.cached(('feed', source_url), NEWS_CACHE_TTL, self.fetch_feed, source_url)
+    
+    def fetch_feed(self, source_url: str):
+        """Download and parse one RSS feed, returning None if it fails or is empty.
+        
+        Revalidates the previous download with If-None-Match/If-Modified-Since,
+        so an unchanged feed costs a 304 and no parsing.
+        """
+        try:
+            etag, modified, previous = self._feed_validators.get(source_url, (None, None, None))
+            headers = {}
+            if previous is not None:
+                if etag:
+                    headers['If-None-Match'] = etag
+                if modified:
+                    headers['If-Modified-Since'] = modified
+            
+            response = self.http_get(source_url, headers=headers, timeout=10)
+            if response.status_code == 304 and previous is not None:
+                return previous
+            response.raise_for_status()
+            
+            # Summaries are cut to 150 characters of plain display text, so skip
+            # feedparser's per-entry HTML sanitizer and relative-URI rewriting
+            feed = feedparser.parse(response.content, response_headers={'content-location': response.url},
+                                    sanitize_html=False, resolve_relative_uris=False)
+            if not feed.entries:
+                return None
+            self._feed_validators[source_url] = (response.headers.get('ETag'),
+                                                 response.headers.get('Last-Modified'), feed)
+            return feed
+        except Exception:
+            return None
+    
     def get_trending_topics(self, command: str) -> str:
         """Get trending topics from various platforms"""
         try:
@@ -220,16 +460,20 @@ class EnhancedWebSearchPlugin(BasePlugin):
             # Google Trends (simplified)
             try:
                 trends_url = "https://trends.google.com/trends/trendingsearches/daily/rss"
-                response = requests.get(trends_url, headers=self.headers, timeout=10)
-                soup = BeautifulSoup(response.text, 'xml')
-                
-                for item in soup.find_all('item')[:10]:
-                    title = item.find('title').text if item.find('title') else "Trending Topic"
-                    trends.append({
-                        'platform': 'Google Trends',
-                        'topic': title,
-                        'type': 'Search Trend'
-                    })
+                # Stream the feed and stop reading once the first 10 items are in
+                with self.http_get(trends_url, timeout=10, stream=True) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    for _, item in etree.iterparse(response.raw, events=('end',), tag='item'):
+                        title = item.findtext('title')
+                        trends.append({
+                            'platform': 'Google Trends',
+                            'topic': title if title is not None else "Trending Topic",
+                            'type': 'Search Trend'
+                        })
+                        item.clear()
+                        if len(trends) == 10:
+                            break
             except Exception:
                 pass
             
@@ -243,13 +487,13 @@ class EnhancedWebSearchPlugin(BasePlugin):
             if not trends:
                 return "❌ Could not fetch trending topics at the moment"
             
-            response = "🔥 **Trending Topics Right Now**\n\n"
+            parts = ["🔥 **Trending Topics Right Now**\n\n"]
             
             for i, trend in enumerate(trends[:15], 1):
-                response += f"{i}. **{trend['topic']}**\n"
-                response += f"   📱 {trend['platform']} | 🏷️ {trend['type']}\n\n"
+                parts.append(f"{i}. **{trend['topic']}**\n"
+                             f"   📱 {trend['platform']} | 🏷️ {trend['type']}\n\n")
             
-            return response
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error fetching trends: {e}"
@@ -260,8 +504,8 @@ class EnhancedWebSearchPlugin(BasePlugin):
             trends = []
             reddit_url = "https://www.reddit.com/r/popular.json"
             
-            response = requests.get(reddit_url, headers=self.headers, timeout=10)
-            data = response.json()
+            response = self.http_get(reddit_url, timeout=10)
+            data = _json_loads(response.content)
             
             for post in data['data']['children'][:10]:
                 post_data = post['data']
@@ -279,7 +523,7 @@ class EnhancedWebSearchPlugin(BasePlugin):
         """Get real-time stock information"""
         try:
             # Extract stock symbol
-            symbols = re.findall(r'\$([A-Z]{1,5})', command.upper())
+            symbols = _STOCK_SYMBOL_RE.findall(command.upper())
             if not symbols:
                 # Try to extract from text
                 words = command.upper().split()
@@ -289,42 +533,51 @@ class EnhancedWebSearchPlugin(BasePlugin):
             if not symbols:
                 return "💰 Please specify a stock symbol. Example: 'stock AAPL' or 'market $TSLA'"
             
-            response = "📈 **Stock Information**\n\n"
+            parts = ["📈 **Stock Information**\n\n"]
             
-            for symbol in symbols:
-                try:
-                    # Using a free API (Alpha Vantage alternative or Yahoo Finance)
-                    stock_url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-                    stock_response = requests.get(stock_url, headers=self.headers, timeout=10)
-                    
-                    if stock_response.status_code == 200:
-                        data = stock_response.json()
-                        if 'chart' in data and data['chart']['result']:
-                            result = data['chart']['result'][0]
-                            meta = result['meta']
-                            
-                            current_price = meta.get('regularMarketPrice', 'N/A')
-                            prev_close = meta.get('previousClose', 'N/A')
-                            change = current_price - prev_close if current_price != 'N/A' and prev_close != 'N/A' else 'N/A'
-                            change_percent = (change / prev_close * 100) if change != 'N/A' and prev_close != 0 else 'N/A'
-                            
-                            response += f"🏢 **{symbol}** ({meta.get('longName', symbol)})\n"
-                            response += f"💲 Current: ${current_price:.2f}\n"
-                            response += f"📊 Change: ${change:.2f} ({change_percent:.2f}%)\n"
-                            response += f"📅 Previous Close: ${prev_close:.2f}\n\n"
-                        else:
-                            response += f"❌ Could not fetch data for {symbol}\n\n"
-                    else:
-                        response += f"❌ Could not fetch data for {symbol}\n\n"
-                        
-                except Exception as e:
-                    response += f"❌ Error fetching {symbol}: {str(e)[:50]}\n\n"
+            # Quote requests are independent, so fetch them side by side;
+            # map keeps the sections in the order the symbols were given
+            with ThreadPoolExecutor(max_workers=min(len(symbols), 8)) as executor:
+                parts.extend(executor.map(self.get_stock_quote, symbols))
             
-            return response
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error fetching stock information: {e}"
     
+    def get_stock_quote(self, symbol: str) -> str:
+        """Fetch one symbol's quote and format it as a response section"""
+        try:
+            meta = self.cached(('stock', symbol), STOCK_CACHE_TTL, self.fetch_stock_meta, symbol)
+            if meta:
+                current_price = meta.get('regularMarketPrice', 'N/A')
+                prev_close = meta.get('previousClose', 'N/A')
+                change = current_price - prev_close if current_price != 'N/A' and prev_close != 'N/A' else 'N/A'
+                change_percent = (change / prev_close * 100) if change != 'N/A' and prev_close != 0 else 'N/A'
+                
+                section = f"🏢 **{symbol}** ({meta.get('longName', symbol)})\n"
+                section += f"💲 Current: ${current_price:.2f}\n"
+                section += f"📊 Change: ${change:.2f} ({change_percent:.2f}%)\n"
+                section += f"📅 Previous Close: ${prev_close:.2f}\n\n"
+                return section
+            
+            return f"❌ Could not fetch data for {symbol}\n\n"
+            
+        except Exception as e:
+            return f"❌ Error fetching {symbol}: {str(e)[:50]}\n\n"
+    
+    def fetch_stock_meta(self, symbol: str) -> dict:
+        """Fetch a symbol's chart metadata from Yahoo Finance, or None if unavailable"""
+        # Using a free API (Alpha Vantage alternative or Yahoo Finance)
+        stock_url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+        stock_response = self.http_get(stock_url, timeout=10)
+        
+        if stock_response.status_code == 200:
+            data = _json_loads(stock_response.content)
+            if 'chart' in data and data['chart']['result']:
+                return data['chart']['result'][0]['meta']
+        return None
+    
     def search_reddit(self, command: str) -> str:
         """Search Reddit for posts"""
         try:
@@ -334,37 +587,32 @@ class EnhancedWebSearchPlugin(BasePlugin):
             
             # Reddit search API
             reddit_url = f"https://www.reddit.com/search.json?q={urllib.parse.quote(query)}&sort=hot&limit=10"
-            response = requests.get(reddit_url, headers=self.headers, timeout=10)
+            response = self.http_get(reddit_url, timeout=10)
             
             if response.status_code != 200:
                 return "❌ Could not access Reddit search at the moment"
             
-            data = response.json()
+            data = _json_loads(response.content)
             posts = data['data']['children']
             
             if not posts:
                 return f"❌ No Reddit posts found for '{query}'"
             
-            result = f"🔴 **Reddit Search Results for '{query}'**\n\n"
+            parts = [f"🔴 **Reddit Search Results for '{query}'**\n\n"]
             
             for i, post in enumerate(posts[:8], 1):
                 post_data = post['data']
-                title = post_data['title']
-                subreddit = post_data['subreddit']
-                score = post_data['score']
-                comments = post_data['num_comments']
-                url = f"https://reddit.com{post_data['permalink']}"
-                
-                result += f"{i}. **{title}**\n"
-                result += f"   📍 r/{subreddit} | ⬆️ {score} | 💬 {comments} comments\n"
-                result += f"   🔗 {url}\n\n"
+                parts.append(f"{i}. **{post_data['title']}**\n"
+                             f"   📍 r/{post_data['subreddit']} | ⬆️ {post_data['score']} | "
+                             f"💬 {post_data['num_comments']} comments\n"
+                             f"   🔗 https://reddit.com{post_data['permalink']}\n\n")
             
             # Open Reddit search in browser
             reddit_search_url = f"https://www.reddit.com/search/?q={urllib.parse.quote(query)}"
             webbrowser.open(reddit_search_url)
-            result += "🌐 Full Reddit search opened in browser"
+            parts.append("🌐 Full Reddit search opened in browser")
             
-            return result
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error searching Reddit: {e}"
@@ -453,11 +701,11 @@ class EnhancedWebSearchPlugin(BasePlugin):
         """Simple calculator function"""
         try:
             # Clean and secure the expression
-            cleaned = re.sub(r'[^0-9+\-*/().\s]', '', expression)
+            cleaned = _CALC_DISALLOWED_RE.sub('', expression).strip()
             if not cleaned:
                 return "❌ Invalid calculation"
             
-            result = eval(cleaned)
+            result = _evaluate_expression(cleaned)
             return f"🧮 **Calculator:** {cleaned} = {result}"
         except Exception:
             return "❌ Invalid mathematical expression"
@@ -479,10 +727,10 @@ class EnhancedWebSearchPlugin(BasePlugin):
             # Try to get a quick definition from a dictionary API
             try:
                 api_url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{term}"
-                response = requests.get(api_url, timeout=5)
+                response = self.http_get(api_url, timeout=5)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json_loads(response.content)
                     if data and len(data) > 0:
                         word_data = data[0]
                         definitions = []
@@ -514,7 +762,7 @@ class EnhancedWebSearchPlugin(BasePlugin):
             
             # Temperature conversions
             if 'celsius' in query_lower and 'fahrenheit' in query_lower:
-                numbers = re.findall(r'-?\d+(?:\.\d+)?', query)
+                numbers = _SIGNED_NUMBER_RE.findall(query)
                 if numbers:
                     if 'celsius' in query_lower.split(numbers[0])[0]:
                         # Celsius to Fahrenheit
@@ -529,7 +777,7 @@ class EnhancedWebSearchPlugin(BasePlugin):
             
             # Distance conversions
             elif 'miles' in query_lower and 'kilometer' in query_lower:
-                numbers = re.findall(r'\d+(?:\.\d+)?', query)
+                numbers = _NUMBER_RE.findall(query)
                 if numbers:
                     if 'miles' in query_lower.split(numbers[0])[0]:
                         # Miles to Kilometers
@@ -554,45 +802,73 @@ class EnhancedWebSearchPlugin(BasePlugin):
             if not query:
                 return "🔄 Please provide a search query. Example: 'realtime search breaking news AI'"
             
-            response = f"🔄 **Real-Time Search for '{query}'**\n\n"
+            parts = [f"🔄 **Real-Time Search for '{query}'**\n\n"]
+            
+            # The sources are independent network calls, so run them side by side
+            # and assemble the sections in the usual order once all have answered
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                news_future = executor.submit(self.get_real_time_news, f"news about {query}")
+                trending_future = None
+                if any(word in query.lower() for word in ['trend', 'viral', 'popular']):
+                    trending_future = executor.submit(self.get_trending_topics, command)
+                reddit_future = executor.submit(self.search_reddit, f"reddit {query}")
+                web_future = executor.submit(self.enhanced_google_search, f"search {query}")
             
             # 1. Get latest news
-            news_results = self.get_real_time_news(f"news about {query}")
+            news_results = news_future.result()
             if "Real-Time News" in news_results:
-                response += news_results[:500] + "...\n\n"
+                parts.append(news_results[:500] + "...\n\n")
             
             # 2. Get trending topics
-            if any(word in query.lower() for word in ['trend', 'viral', 'popular']):
-                trending = self.get_trending_topics(command)
+            if trending_future is not None:
+                trending = trending_future.result()
                 if "Trending Topics" in trending:
-                    response += trending[:300] + "...\n\n"
+                    parts.append(trending[:300] + "...\n\n")
             
             # 3. Social media search
-            reddit_results = self.search_reddit(f"reddit {query}")
+            reddit_results = reddit_future.result()
             if "Reddit Search Results" in reddit_results:
-                response += reddit_results[:400] + "...\n\n"
+                parts.append(reddit_results[:400] + "...\n\n")
             
             # 4. Regular web search
-            web_results = self.enhanced_google_search(f"search {query}")
+            web_results = web_future.result()
             if "Enhanced Search Results" in web_results:
-                response += web_results[:500] + "..."
+                parts.append(web_results[:500] + "...")
             
-            return response
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error in real-time search: {e}"
     
     def get_search_suggestions(self, query: str) -> list:
         """Get search suggestions for a query"""
+        prefix = query.lower()
+        
+        # While typing, each query extends the last one: the longest cached
+        # shorter prefix can answer if enough of its completions still match
+        for end in range(len(prefix) - 1, 0, -1):
+            ancestor = self.cache_peek(('suggest', prefix[:end]))
+            if ancestor:
+                matches = [s for s in ancestor if s.lower().startswith(prefix)]
+                if len(matches) >= SUGGESTION_COUNT:
+                    return matches[:SUGGESTION_COUNT]
+                break
+        
+        suggestions = self.cached(('suggest', prefix), SUGGEST_CACHE_TTL,
+                                  self.fetch_search_suggestions, query)
+        return suggestions[:SUGGESTION_COUNT]
+    
+    def fetch_search_suggestions(self, query: str) -> list:
+        """Ask Google Suggest for all completions of a query"""
         try:
             # Google Suggest API
             suggest_url = f"http://suggestqueries.google.com/complete/search?client=chrome&q={urllib.parse.quote(query)}"
-            response = requests.get(suggest_url, timeout=5)
+            response = self.http_get(suggest_url, timeout=5)
             
             if response.status_code == 200:
-                suggestions = response.json()
+                suggestions = _json_loads(response.content)
                 if len(suggestions) > 1:
-                    return suggestions[1][:5]  # Return first 5 suggestions
+                    return suggestions[1]
             
             return []
         except Exception:
@@ -615,20 +891,8 @@ class EnhancedWebSearchPlugin(BasePlugin):
     
     def extract_query(self, command: str) -> str:
         """Extract search query from command"""
-        remove_words = [
-            "search", "google", "find", "news", "trending", "stock", "reddit", 
-            "images", "videos", "maps", "instant", "realtime", "live", "for", 
-            "about", "on", "of", "the", "and", "prices", "compare", "check"
-        ]
-        
-        words = command.split()
-        query_words = []
-        
-        for word in words:
-            if word.lower() not in remove_words:
-                query_words.append(word)
-        
-        return " ".join(query_words).strip()
+        # Blank out the command words, then collapse the leftover whitespace
+        return " ".join(_QUERY_STOP_WORDS_RE.sub(" ", command).split())
     
     def show_advanced_help(self) -> str:
         """Show comprehensive help for enhanced search"""
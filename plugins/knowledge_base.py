@@ -1,12 +1,75 @@
+import atexit
 import json
 import os
 import hashlib
 import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from advanced_plugin_manager import BasePlugin
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+
+# orjson reads and writes the knowledge base file much faster when installed;
+# both variants work on UTF-8 bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# Accumulated in-memory changes are written out after this many updates, or
+# on the next update once this many seconds have passed since the last write.
+KB_FLUSH_EVERY = 32
+KB_FLUSH_INTERVAL = 2.0
+
+# Web lookups made while learning are kept in memory for repeat questions
+LOOKUP_CACHE_TTL = 3600
+LOOKUP_CACHE_SIZE = 512
+
+_QUESTION_STARTER_RE = re.compile(r"what is|who is|what are|who are|what's|who's", re.IGNORECASE)
+_ARTICLE_RE = re.compile(r'\b(?:a|an|the)\b', re.IGNORECASE)
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
+# Deletes every ASCII character _PUNCT_RE would remove, so normalize_topic can
+# skip the regex for the usual all-ASCII topic
+_ASCII_PUNCT_TABLE = str.maketrans({
+    c: None for c in map(chr, range(128))
+    if not (c.isalnum() or c == '_' or c.isspace())
+})
+
+WIKIPEDIA_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/{}"
+WIKIPEDIA_SEARCH_URL = "https://en.wikipedia.org/w/api.php"
+
+# Google snippet extraction, compiled once and evaluated by libxml2: the first
+# featured snippet or knowledge panel description, and the first five p/div
+# elements in document order
+_FEATURED_SNIPPET_XPATH = etree.XPath(
+    "(//div[contains(concat(' ', normalize-space(@class), ' '), ' featured-snippet ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' kno-rdesc ')])[1]"
+)
+_LEADING_BLOCKS_XPATH = etree.XPath("(//p | //div)[position() <= 5]")
+
+# Tokens kept in the inverted word index; calculate_relevance ignores words
+# of two characters or fewer, so the index does too
+_WORD_RE = re.compile(r'\w+')
+_INDEX_STOP_WORDS = frozenset({
+    "and", "are", "for", "from", "how", "that", "the", "this", "was",
+    "what", "when", "where", "which", "who", "why", "with",
+})
 
 class KnowledgeBasePlugin(BasePlugin):
     """
@@ -28,6 +91,29 @@ class KnowledgeBasePlugin(BasePlugin):
         # Knowledge storage
         self.knowledge_file = "knowledge_base.json"
         self.knowledge_base = self.load_knowledge_base()
+        # Inverted index, word -> {topic key: count}. It is derived from the
+        # entries, so it is rebuilt on load rather than saved with them
+        self._index = {}
+        self.rebuild_index()
+        self._dirty = False
+        self._writes_pending = 0
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush_knowledge_base)
+        
+        # Least recently used lookup first: key -> (expires_at, result)
+        self._lookup_cache = {}
+        self._lookup_cache_lock = threading.Lock()
+        
+        # Pooled session so repeated lookups reuse their TCP/TLS connections
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                              max_retries=Retry(total=2, backoff_factor=0.3,
+                                                status_forcelist=(500, 502, 503, 504)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Learning settings
         self.auto_learn = True
@@ -38,8 +124,11 @@ class KnowledgeBasePlugin(BasePlugin):
         """Load the knowledge base from file"""
         if os.path.exists(self.knowledge_file):
             try:
-                with open(self.knowledge_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.knowledge_file, 'rb') as f:
+                    knowledge_base = _json_loads(f.read())
+                # Files written by earlier versions carry a saved index
+                knowledge_base.pop("index", None)
+                return knowledge_base
             except Exception as e:
                 print(f"Error loading knowledge base: {e}")
                 return {"entries": {}, "topics": {}, "metadata": {"created": datetime.now().isoformat()}}
@@ -48,11 +137,31 @@ class KnowledgeBasePlugin(BasePlugin):
     def save_knowledge_base(self):
         """Save the knowledge base to file"""
         try:
-            with open(self.knowledge_file, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_base, f, indent=2, ensure_ascii=False)
+            # Write to a sibling file and swap it in so a crash mid-write
+            # never leaves a truncated knowledge_base.json behind
+            temp_file = f"{self.knowledge_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(_json_dumps(self.knowledge_base))
+            os.replace(temp_file, self.knowledge_file)
+            self._dirty = False
+            self._writes_pending = 0
+            self._last_flush = time.monotonic()
         except Exception as e:
             print(f"Error saving knowledge base: {e}")
     
+    def mark_dirty(self):
+        """Record an in-memory change, saving once enough have accumulated"""
+        self._dirty = True
+        self._writes_pending += 1
+        if (self._writes_pending >= KB_FLUSH_EVERY
+                or time.monotonic() - self._last_flush >= KB_FLUSH_INTERVAL):
+            self.save_knowledge_base()
+    
+    def flush_knowledge_base(self):
+        """Save the knowledge base if it has unsaved changes"""
+        if self._dirty:
+            self.save_knowledge_base()
+    
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle knowledge base commands"""
         command_lower = command.lower().strip()
@@ -79,19 +188,12 @@ class KnowledgeBasePlugin(BasePlugin):
     
     def answer_question(self, question: str) -> str:
         """Answer a 'what is' or 'who is' question"""
-        # Extract the topic from the question
-        question_lower = question.lower()
-        
         # Remove question words to get the topic
-        for starter in ["what is", "who is", "what are", "who are", "what's", "who's"]:
-            if question_lower.startswith(starter):
-                topic = question[len(starter):].strip()
-                break
-        else:
-            topic = question.strip()
+        starter = _QUESTION_STARTER_RE.match(question)
+        topic = question[starter.end():].strip() if starter else question.strip()
         
         # Remove articles and common words
-        topic = re.sub(r'\b(a|an|the)\b', '', topic, flags=re.IGNORECASE).strip()
+        topic = _ARTICLE_RE.sub('', topic).strip()
         
         # Search existing knowledge
         result = self.search_knowledge(topic)
@@ -147,13 +249,18 @@ class KnowledgeBasePlugin(BasePlugin):
             # Use multiple sources for better information
             sources = []
             
+            # Both lookups are independent network calls, so run them side by side
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                wiki_future = executor.submit(self.search_wikipedia, topic)
+                google_future = executor.submit(self.search_google_extract, topic, detailed)
+            
             # Try Wikipedia first (most reliable)
-            wiki_info = self.search_wikipedia(topic)
+            wiki_info = wiki_future.result()
             if wiki_info:
                 sources.append({"source": "wikipedia", "content": wiki_info, "reliability": 0.9})
             
             # Try Google search
-            google_info = self.search_google_extract(topic, detailed)
+            google_info = google_future.result()
             if google_info:
                 sources.append({"source": "google", "content": google_info, "reliability": 0.7})
             
@@ -168,60 +275,105 @@ class KnowledgeBasePlugin(BasePlugin):
             print(f"Error in web search: {e}")
             return None
     
+    def cached_lookup(self, key: tuple, fetch, *args):
+        """Return the cached result for key, or call fetch(*args) and cache it.
+        
+        Empty results are not cached, so a failed lookup is retried next time.
+        """
+        now = time.monotonic()
+        with self._lookup_cache_lock:
+            entry = self._lookup_cache.pop(key, None)
+            if entry is not None and entry[0] > now:
+                self._lookup_cache[key] = entry
+                return entry[1]
+        
+        value = fetch(*args)
+        if value:
+            with self._lookup_cache_lock:
+                self._lookup_cache[key] = (now + LOOKUP_CACHE_TTL, value)
+                if len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+                    del self._lookup_cache[next(iter(self._lookup_cache))]
+        return value
+    
     def search_wikipedia(self, topic: str) -> Optional[str]:
         """Search Wikipedia for topic information"""
+        return self.cached_lookup(('wikipedia', topic.lower().strip()),
+                                  self.fetch_wikipedia, topic)
+    
+    def fetch_wikipedia(self, topic: str) -> Optional[str]:
+        """Look a topic up on Wikipedia"""
         try:
-            import wikipedia
-            
-            # Search for the topic
-            search_results = wikipedia.search(topic, results=3)
-            
-            if search_results:
-                # Get the first result
-                page = wikipedia.page(search_results[0])
-                
-                # Get summary (first few sentences)
-                summary = wikipedia.summary(search_results[0], sentences=3)
-                
+            # The REST summary endpoint returns title, extract and URL in one
+            # call; only fall back to a search when the topic is not an exact
+            # (or redirected) article title
+            page = self.fetch_wikipedia_summary(topic)
+            if page is None:
+                response = self.session.get(WIKIPEDIA_SEARCH_URL, params={
+                    "action": "query", "list": "search", "srsearch": topic,
+                    "srlimit": 1, "srprop": "", "format": "json",
+                }, timeout=5)
+                response.raise_for_status()
+                search_results = _json_loads(response.content).get("query", {}).get("search", [])
+                if search_results:
+                    page = self.fetch_wikipedia_summary(search_results[0]["title"])
+            
+            if page:
+                extract = page.get("extract", "")
                 return {
-                    "title": page.title,
-                    "summary": summary,
-                    "url": page.url,
-                    "full_content": page.content[:2000]  # First 2000 chars
+                    "title": page.get("title", topic),
+                    "summary": extract,
+                    "url": page.get("content_urls", {}).get("desktop", {}).get("page", ""),
+                    "full_content": extract[:2000]  # First 2000 chars
                 }
+            return None
         except Exception as e:
             print(f"Wikipedia search error: {e}")
             return None
     
+    def fetch_wikipedia_summary(self, title: str) -> Optional[Dict[str, Any]]:
+        """Fetch an article summary, or None if there is no usable article by that title"""
+        url = WIKIPEDIA_SUMMARY_URL.format(urllib.parse.quote(title.strip().replace(" ", "_"), safe=""))
+        response = self.session.get(url, timeout=5)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        page = _json_loads(response.content)
+        # Disambiguation pages list meanings rather than describing the topic
+        if page.get("type") == "disambiguation" or not page.get("extract"):
+            return None
+        return page
+    
     def search_google_extract(self, topic: str, detailed: bool = False) -> Optional[str]:
         """Search Google and extract information"""
+        return self.cached_lookup(('google', topic.lower().strip()),
+                                  self.fetch_google_extract, topic, detailed)
+    
+    def fetch_google_extract(self, topic: str, detailed: bool = False) -> Optional[str]:
+        """Download a Google results page and extract snippets about a topic"""
         try:
             # Create search query
             query = f"{topic} definition explanation"
             
-            # Use a simple web scraping approach
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
             search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-            response = requests.get(search_url, headers=headers, timeout=10)
+            response = self.session.get(search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                # lxml parses in C and detects the encoding from the raw bytes
+                document = lxml.html.fromstring(response.content)
                 
                 # Look for featured snippets or knowledge panels
                 snippets = []
                 
                 # Try to find featured snippet
-                featured = soup.find('div', {'class': ['featured-snippet', 'kno-rdesc']})
+                featured = _FEATURED_SNIPPET_XPATH(document)
                 if featured:
-                    snippets.append(featured.get_text().strip())
+                    snippets.append(featured[0].text_content().strip())
                 
                 # Look for other relevant content
-                for elem in soup.find_all(['p', 'div'], limit=5):
-                    text = elem.get_text().strip()
-                    if len(text) > 50 and topic.lower() in text.lower():
+                topic_lower = topic.lower()
+                for elem in _LEADING_BLOCKS_XPATH(document):
+                    text = elem.text_content().strip()
+                    if len(text) > 50 and topic_lower in text.lower():
                         snippets.append(text)
                 
                 if snippets:
@@ -277,23 +429,29 @@ class KnowledgeBasePlugin(BasePlugin):
             # Create a normalized key for the topic
             topic_key = self.normalize_topic(topic)
             
-            # Add metadata
+            # Add metadata; stored_ts and last_accessed are epoch timestamps
+            # for the cleanup and search paths, stored_date is for people
+            now = time.time()
             knowledge.update({
                 "source": source,
                 "confidence": confidence,
-                "stored_date": datetime.now().isoformat(),
-                "last_accessed": datetime.now().isoformat(),
+                "stored_date": datetime.fromtimestamp(now).isoformat(),
+                "stored_ts": now,
+                "last_accessed": now,
                 "access_count": 0
             })
             
-            # Store in knowledge base
+            # Store in knowledge base, replacing any older entry's postings
+            if topic_key in self.knowledge_base["entries"]:
+                self.unindex_entry(topic_key)
             self.knowledge_base["entries"][topic_key] = knowledge
+            self.index_entry(topic_key, knowledge)
             
             # Update topic index
             self.update_topic_index(topic, topic_key)
             
-            # Save to file
-            self.save_knowledge_base()
+            # Save to file (batched with other pending changes)
+            self.mark_dirty()
             
             print(f"📚 Stored knowledge about: {topic}")
             
@@ -305,22 +463,48 @@ class KnowledgeBasePlugin(BasePlugin):
         try:
             query_lower = query.lower()
             best_match = None
-            best_score = 0
+            entries = self.knowledge_base["entries"]
+            
+            # Split the query once rather than once per scored entry
+            query_words = [word for word in query_lower.split() if len(word) > 2]
+            
+            # An entry stored under exactly this topic that reaches the maximum
+            # score cannot be beaten, so there is no need to look any further
+            direct_key = self.normalize_topic(query)
+            direct_match = entries.get(direct_key)
+            if (direct_match is not None and
+                    self.calculate_relevance(query_lower, direct_key, direct_match, query_words) >= 1.0):
+                best_match = direct_match
+                candidates = ()
+            else:
+                # Only score entries sharing an indexed word with the query;
+                # queries made up entirely of short or stop words scan everything
+                query_tokens = self.tokenize(query_lower)
+                if query_tokens:
+                    index = self._index
+                    candidates = {}
+                    for token in query_tokens:
+                        candidates.update(dict.fromkeys(index.get(token, ())))
+                else:
+                    candidates = entries
             
             # Search through stored knowledge
-            for topic_key, knowledge in self.knowledge_base["entries"].items():
-                # Calculate relevance score
-                score = self.calculate_relevance(query_lower, topic_key, knowledge)
-                
-                if score > best_score and score > self.confidence_threshold:
-                    best_score = score
-                    best_match = knowledge
+            if candidates:
+                best_match = self.best_relevance(query_lower, query_words, candidates)
+            
+            # The index only holds whole words, but relevance also counts parts of
+            # words ("learn" in "machine learning"), so without a match from the
+            # candidates the remaining entries are scored as well
+            if best_match is None and candidates is not entries:
+                best_match = self.best_relevance(
+                    query_lower, query_words,
+                    [topic_key for topic_key in entries if topic_key not in candidates])
             
             if best_match:
                 # Update access statistics
                 best_match["access_count"] = best_match.get("access_count", 0) + 1
-                best_match["last_accessed"] = datetime.now().isoformat()
-                self.save_knowledge_base()
+                best_match["last_accessed"] = time.time()
+                self.mark_dirty()
                 
                 # Format response
                 response = best_match.get("summary", "")
@@ -340,24 +524,47 @@ class KnowledgeBasePlugin(BasePlugin):
         except Exception as e:
             return f"Error searching knowledge: {e}"
     
-    def calculate_relevance(self, query: str, topic_key: str, knowledge: Dict) -> float:
-        """Calculate how relevant a knowledge entry is to a query"""
+    def best_relevance(self, query: str, query_words: List[str], topic_keys) -> Optional[Dict]:
+        """Return the most relevant of the given entries that beats the confidence threshold"""
+        best_score = 0
+        best_match = None
+        entries = self.knowledge_base["entries"]
+        for topic_key in topic_keys:
+            knowledge = entries.get(topic_key)
+            if knowledge is None:
+                # Entries removed without going through unindex_entry
+                continue
+            # Calculate relevance score
+            score = self.calculate_relevance(query, topic_key, knowledge, query_words)
+            
+            if score > best_score and score > self.confidence_threshold:
+                best_score = score
+                best_match = knowledge
+        return best_match
+    
+    def calculate_relevance(self, query: str, topic_key: str, knowledge: Dict,
+                            query_words: Optional[List[str]] = None) -> float:
+        """Calculate how relevant a knowledge entry is to a query.
+        
+        query_words are the query's words longer than two characters; callers
+        scoring many entries can pass them in to avoid re-splitting the query.
+        """
         score = 0.0
         
-        # Check topic key match
-        if query in topic_key.lower():
+        # Check topic key match (keys are already lowercase)
+        if query in topic_key:
             score += 0.8
         
         # Check summary match
         summary = knowledge.get("summary", "").lower()
-        query_words = query.split()
+        if query_words is None:
+            query_words = [word for word in query.split() if len(word) > 2]
         
         for word in query_words:
-            if len(word) > 2:  # Skip short words
-                if word in summary:
-                    score += 0.2
-                if word in topic_key:
-                    score += 0.3
+            if word in summary:
+                score += 0.2
+            if word in topic_key:
+                score += 0.3
         
         # Boost score for exact topic matches
         topic = knowledge.get("topic", "").lower()
@@ -370,27 +577,58 @@ class KnowledgeBasePlugin(BasePlugin):
         
         return min(score, 1.0)
     
+    def tokenize(self, text: str) -> Counter:
+        """Count the indexable words in a piece of text"""
+        return Counter(
+            word for word in _WORD_RE.findall(text.lower())
+            if len(word) > 2 and word not in _INDEX_STOP_WORDS
+        )
+    
+    def entry_tokens(self, knowledge: Dict[str, Any]) -> Counter:
+        """Count the indexable words in an entry's topic and summary"""
+        return self.tokenize(f"{knowledge.get('topic', '')} {knowledge.get('summary', '')}")
+    
+    def index_entry(self, topic_key: str, knowledge: Dict[str, Any]):
+        """Add an entry's words to the inverted index"""
+        index = self._index
+        for token, count in self.entry_tokens(knowledge).items():
+            index.setdefault(token, {})[topic_key] = count
+    
+    def unindex_entry(self, topic_key: str):
+        """Remove an entry's words from the inverted index"""
+        index = self._index
+        knowledge = self.knowledge_base["entries"].get(topic_key, {})
+        for token in self.entry_tokens(knowledge):
+            postings = index.get(token)
+            if postings is not None:
+                postings.pop(topic_key, None)
+                if not postings:
+                    del index[token]
+    
+    def rebuild_index(self):
+        """Rebuild the inverted index from the stored entries"""
+        self._index = {}
+        for topic_key, knowledge in self.knowledge_base["entries"].items():
+            self.index_entry(topic_key, knowledge)
+    
     def normalize_topic(self, topic: str) -> str:
         """Normalize a topic for consistent storage"""
         # Convert to lowercase, remove extra spaces and special chars
-        normalized = re.sub(r'[^\w\s]', '', topic.lower())
-        normalized = re.sub(r'\s+', '_', normalized.strip())
-        return normalized
+        normalized = topic.lower()
+        if normalized.isascii():
+            normalized = normalized.translate(_ASCII_PUNCT_TABLE)
+        else:
+            normalized = _PUNCT_RE.sub('', normalized)
+        return '_'.join(normalized.split())
     
     def update_topic_index(self, original_topic: str, topic_key: str):
-        """Update the topic index for faster searching"""
-        if "topics" not in self.knowledge_base:
-            self.knowledge_base["topics"] = {}
-        
-        # Store various forms of the topic
-        forms = [
-            original_topic.lower(),
-            topic_key,
-            original_topic.replace(" ", "_").lower()
-        ]
+        """Record the spellings a topic was stored under"""
+        topics = self.knowledge_base.setdefault("topics", {})
         
-        for form in forms:
-            self.knowledge_base["topics"][form] = topic_key
+        # The lowercased topic and its normalized key; for most topics they
+        # are the same string, stored once
+        topics[original_topic.lower()] = topic_key
+        topics[topic_key] = topic_key
     
     def manual_learn(self, command: str) -> str:
         """Manually learn information"""
@@ -438,6 +676,7 @@ class KnowledgeBasePlugin(BasePlugin):
         topic_key = self.normalize_topic(topic)
         
         if topic_key in self.knowledge_base["entries"]:
+            self.unindex_entry(topic_key)
             del self.knowledge_base["entries"][topic_key]
             self.save_knowledge_base()
             return f"✅ I've forgotten information about '{topic}'"
@@ -464,18 +703,24 @@ class KnowledgeBasePlugin(BasePlugin):
     def clear_knowledge(self) -> str:
         """Clear the knowledge base"""
         self.knowledge_base = {"entries": {}, "topics": {}, "metadata": {"created": datetime.now().isoformat()}}
+        self._index = {}
         self.save_knowledge_base()
         return "🗑️ Knowledge base cleared."
     
     def cleanup_old_knowledge(self):
         """Remove old or low-confidence knowledge"""
-        current_time = datetime.now()
+        now = time.time()
         entries_to_remove = []
         
         for topic_key, knowledge in self.knowledge_base["entries"].items():
             # Check age
-            stored_date = datetime.fromisoformat(knowledge.get("stored_date", current_time.isoformat()))
-            age_days = (current_time - stored_date).days
+            stored_ts = knowledge.get("stored_ts")
+            if stored_ts is None:
+                # Entries saved before stored_ts existed only have the ISO date
+                stored_date = knowledge.get("stored_date")
+                stored_ts = datetime.fromisoformat(stored_date).timestamp() if stored_date else now
+                knowledge["stored_ts"] = stored_ts
+            age_days = int((now - stored_ts) // 86400)
             
             # Check confidence and usage
             confidence = knowledge.get("confidence", 0)
@@ -487,6 +732,7 @@ class KnowledgeBasePlugin(BasePlugin):
         
         # Remove marked entries
         for topic_key in entries_to_remove:
+            self.unindex_entry(topic_key)
             del self.knowledge_base["entries"][topic_key]
         
         if entries_to_remove:
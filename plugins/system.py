@@ -1,14 +1,38 @@
+import heapq
 import os
 import subprocess
 import psutil
+import sys
 import time
 from advanced_plugin_manager import BasePlugin
 
+# Back-to-back process commands share one process_iter pass within this window
+PROCESS_SNAPSHOT_TTL = 1.0
+
+# Media keys are sent straight through user32 on Windows, instead of starting
+# a PowerShell and a WScript.Shell COM object for every keypress
+_VK_VOLUME_MUTE = 0xAD
+_VK_VOLUME_DOWN = 0xAE
+_VK_VOLUME_UP = 0xAF
+_KEYEVENTF_KEYUP = 0x0002
+
+_keybd_event = None
+if sys.platform == "win32":
+    import ctypes
+
+    try:
+        _keybd_event = ctypes.windll.user32.keybd_event
+    except AttributeError:
+        _keybd_event = None
+
 class SystemPlugin(BasePlugin):
     def __init__(self):
         super().__init__()
         self.description = "Control system functions like volume, brightness, processes"
         self.commands = ["volume", "brightness", "processes", "system", "task", "kill", "cpu", "memory", "disk"]
+        self._proc_cache = (0.0, [])
+        self._brightness_methods = None
+        self._brightness_attempted = False
     
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle system control commands"""
@@ -33,40 +57,67 @@ class SystemPlugin(BasePlugin):
         """Control system volume"""
         try:
             if "up" in command.lower() or "increase" in command.lower():
-                os.system("powershell -c \"(New-Object -ComObject WScript.Shell).SendKeys([char]175)\"")
+                self.press_media_key(_VK_VOLUME_UP)
                 return "Volume increased"
             elif "down" in command.lower() or "decrease" in command.lower():
-                os.system("powershell -c \"(New-Object -ComObject WScript.Shell).SendKeys([char]174)\"")
+                self.press_media_key(_VK_VOLUME_DOWN)
                 return "Volume decreased"
             elif "mute" in command.lower():
-                os.system("powershell -c \"(New-Object -ComObject WScript.Shell).SendKeys([char]173)\"")
+                self.press_media_key(_VK_VOLUME_MUTE)
                 return "Volume muted/unmuted"
             else:
                 return "Volume commands: 'volume up', 'volume down', 'volume mute'"
         except Exception as e:
             return f"Error controlling volume: {e}"
     
+    def press_media_key(self, vk_code: int):
+        """Press and release a media key"""
+        if _keybd_event is not None:
+            _keybd_event(vk_code, 0, 0, 0)
+            _keybd_event(vk_code, 0, _KEYEVENTF_KEYUP, 0)
+        else:
+            os.system(f"powershell -c \"(New-Object -ComObject WScript.Shell).SendKeys([char]{vk_code})\"")
+    
     def handle_brightness(self, command: str) -> str:
         """Control screen brightness (Windows specific)"""
         try:
             if "up" in command.lower() or "increase" in command.lower():
-                # Use powershell to increase brightness
-                result = subprocess.run([
-                    "powershell", "-Command",
-                    "(Get-WmiObject -Namespace root/WMI -Class WmiMonitorBrightnessMethods).WmiSetBrightness(1,100)"
-                ], capture_output=True, text=True)
+                self.set_brightness(100)
                 return "Brightness increased (this may not work on all systems)"
             elif "down" in command.lower() or "decrease" in command.lower():
-                result = subprocess.run([
-                    "powershell", "-Command",
-                    "(Get-WmiObject -Namespace root/WMI -Class WmiMonitorBrightnessMethods).WmiSetBrightness(1,50)"
-                ], capture_output=True, text=True)
+                self.set_brightness(50)
                 return "Brightness decreased (this may not work on all systems)"
             else:
                 return "Brightness commands: 'brightness up', 'brightness down'"
         except Exception as e:
             return f"Error controlling brightness: {e}"
     
+    @property
+    def brightness_methods(self):
+        """WmiMonitorBrightnessMethods of the first monitor, looked up on first access; None if unavailable"""
+        if not self._brightness_attempted:
+            self._brightness_attempted = True
+            if sys.platform == "win32":
+                try:
+                    import wmi
+                    self._brightness_methods = wmi.WMI(namespace="wmi").WmiMonitorBrightnessMethods()[0]
+                except Exception as e:
+                    print(f"WMI brightness control unavailable: {e}")
+        return self._brightness_methods
+    
+    def set_brightness(self, level: int):
+        """Set the display brightness to a percentage"""
+        methods = self.brightness_methods
+        if methods is not None:
+            # The wmi module passes positional arguments in declaration order
+            # (Brightness, Timeout), unlike the PowerShell call below
+            methods.WmiSetBrightness(Brightness=level, Timeout=0)
+        else:
+            subprocess.run([
+                "powershell", "-Command",
+                f"(Get-WmiObject -Namespace root/WMI -Class WmiMonitorBrightnessMethods).WmiSetBrightness(1,{level})"
+            ], capture_output=True, text=True)
+    
     def handle_processes(self, command: str) -> str:
         """Handle process-related commands"""
         try:
@@ -79,23 +130,27 @@ class SystemPlugin(BasePlugin):
         except Exception as e:
             return f"Error handling processes: {e}"
     
+    def _snapshot_procs(self) -> list:
+        """Processes with pid, name, cpu and memory info, reused for up to a second"""
+        now = time.monotonic()
+        taken_at, procs = self._proc_cache
+        if procs and now - taken_at < PROCESS_SNAPSHOT_TTL:
+            return procs
+        procs = list(psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']))
+        self._proc_cache = (now, procs)
+        return procs
+    
     def list_top_processes(self) -> str:
         """List top CPU consuming processes"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    proc_info = proc.info
-                    if proc_info['cpu_percent'] is not None:
-                        processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            processes = [proc.info for proc in self._snapshot_procs()
+                         if proc.info['cpu_percent'] is not None]
             
-            # Sort by CPU usage
-            processes.sort(key=lambda x: x['cpu_percent'] or 0, reverse=True)
+            # Only the top 10 are shown, so select them rather than sort everything
+            top = heapq.nlargest(10, processes, key=lambda x: x['cpu_percent'] or 0)
             
             result = "Top 10 processes by CPU usage:\n"
-            for i, proc in enumerate(processes[:10]):
+            for i, proc in enumerate(top):
                 result += f"{i+1}. {proc['name']} (PID: {proc['pid']}) - CPU: {proc['cpu_percent']:.1f}% Memory: {proc['memory_percent']:.1f}%\n"
             
             return result
@@ -121,15 +176,18 @@ class SystemPlugin(BasePlugin):
             except ValueError:
                 # Not a number, treat as process name
                 killed = []
-                for proc in psutil.process_iter(['pid', 'name']):
+                target_lower = target.lower()
+                for proc in self._snapshot_procs():
                     try:
-                        if target.lower() in proc.info['name'].lower():
+                        if target_lower in (proc.info['name'] or '').lower():
                             proc.terminate()
                             killed.append(f"{proc.info['name']} (PID: {proc.info['pid']})")
                     except (psutil.NoSuchProcess, psutil.AccessDenied):
                         pass
                 
                 if killed:
+                    # The snapshot no longer reflects what is running
+                    self._proc_cache = (0.0, [])
                     return f"Terminated processes: {', '.join(killed)}"
                 else:
                     return f"No processes found matching '{target}'"
@@ -1,13 +1,45 @@
 import requests
+from requests.adapters import HTTPAdapter
 import re
+import time
 from advanced_plugin_manager import BasePlugin
 
+# orjson decodes the forecast payload (40 entries) noticeably faster when it
+# is installed; both loaders accept the raw response bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# API answers are reused for repeat questions about the same city
+WEATHER_CACHE_TTL = 600
+WEATHER_CACHE_SIZE = 64
+
+# Patterns like "weather in Paris" or "temperature for London" in one regex.
+# Anchoring each alternative behind a lazy ".*?" keeps their priority: a later
+# alternative is only tried once the earlier ones cannot match anywhere.
+_CITY_RE = re.compile(
+    r"^(?:.*?(?:in|for|at)\s+([a-zA-Z]{2}[a-zA-Z\s]*?)(?:\s|$)"
+    r"|.*?weather\s+([a-zA-Z]{2}[a-zA-Z\s]*?)(?:\s|$)"
+    r"|.*?temperature\s+([a-zA-Z]{2}[a-zA-Z\s]*?)(?:\s|$))",
+    re.DOTALL,
+)
+
 class WeatherPlugin(BasePlugin):
     def __init__(self):
         super().__init__()
         self.description = "Get weather information for any city"
         self.commands = ["weather", "temperature", "forecast", "climate"]
         self.api_key = "your_openweathermap_api_key"  # Replace with your API key
+        
+        # Current weather and forecast share one pooled connection to the API
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        
+        # Least recently used first: (endpoint, city) -> (expires_at, data)
+        self._cache = {}
     
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle weather-related commands"""
@@ -23,32 +55,39 @@ class WeatherPlugin(BasePlugin):
         text = text.lower()
         
         # Look for patterns like "weather in Paris" or "temperature for London"
-        patterns = [
-            r"(?:in|for|at)\s+([a-zA-Z\s]+?)(?:\s|$)",
-            r"weather\s+([a-zA-Z\s]+?)(?:\s|$)",
-            r"temperature\s+([a-zA-Z\s]+?)(?:\s|$)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                city = match.group(1).strip()
-                if city and len(city) > 1:
-                    return city.title()
+        match = _CITY_RE.match(text)
+        if match:
+            city = next(group for group in match.groups() if group)
+            return city.strip().title()
         
         return "London"  # Default city
     
+    def fetch_weather_data(self, endpoint: str, city: str) -> dict:
+        """Get the API's JSON for an endpoint and city, reusing answers up to ten minutes old"""
+        key = (endpoint, city.lower())
+        now = time.monotonic()
+        entry = self._cache.pop(key, None)
+        if entry is not None and entry[0] > now:
+            self._cache[key] = entry
+            return entry[1]
+        
+        url = f"https://api.openweathermap.org/data/2.5/{endpoint}?q={city}&appid={self.api_key}&units=metric"
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        
+        self._cache[key] = (now + WEATHER_CACHE_TTL, data)
+        if len(self._cache) > WEATHER_CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]
+        return data
+    
     def get_current_weather(self, city: str) -> str:
         """Get current weather for a city"""
         if self.api_key == "your_openweathermap_api_key":
             return f"Weather plugin needs API key configuration. Would show weather for {city}."
         
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.api_key}&units=metric"
-        
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self.fetch_weather_data("weather", city)
             
             weather = data["weather"][0]["description"].title()
             temp = data["main"]["temp"]
@@ -72,12 +111,8 @@ class WeatherPlugin(BasePlugin):
         if self.api_key == "your_openweathermap_api_key":
             return f"Weather forecast plugin needs API key configuration. Would show forecast for {city}."
         
-        url = f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={self.api_key}&units=metric"
-        
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self.fetch_weather_data("forecast", city)
             
             forecast_text = f"5-day forecast for {city}:\n"
             
@@ -1,14 +1,44 @@
+import re
+import time
 import webbrowser
 import urllib.parse
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from advanced_plugin_manager import BasePlugin
 
+# Multi-keyword dispatch tests, each one compiled scan instead of an any() loop
+_SITE_RE = re.compile(r"\.com|\.org|\.net|www")
+_SEARCH_RE = re.compile(r"search|google|find")
+
+# The first three result headings on a Google results page
+_RESULT_TITLES_XPATH = etree.XPath("(//h3)[position() <= 3]")
+
+# First whitespace-separated word that starts with "www." or contains a
+# common top-level domain
+_URL_TOKEN_RE = re.compile(r"(?<!\S)(?=www\.|\S*?\.(?i:com|org|net|gov|edu))\S+")
+
+# Command words dropped from search queries
+_REMOVE_WORDS = frozenset({"search", "google", "find", "youtube", "wikipedia", "wiki", "open", "for", "about"})
+
+# Wikipedia summaries are reused for repeat lookups of the same topic
+WIKI_CACHE_TTL = 600
+WIKI_CACHE_SIZE = 128
+
 class WebSearchPlugin(BasePlugin):
     def __init__(self):
         super().__init__()
         self.description = "Search the web and open websites"
         self.commands = ["search", "google", "website", "open", "browse", "youtube", "wiki", "wikipedia"]
+        
+        # Least recently used first: topic -> (expires_at, (summary, url))
+        self._wiki_cache = {}
+        
+        # Keeps the connection to Google alive between searches
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
     
     def handle_command(self, command: str, **kwargs) -> str:
         """Handle web search and browsing commands"""
@@ -16,11 +46,11 @@ class WebSearchPlugin(BasePlugin):
         
         if "youtube" in command_lower:
             return self.search_youtube(command)
-        elif any(word in command_lower for word in ["wiki", "wikipedia"]):
+        elif "wiki" in command_lower:  # also covers "wikipedia"
             return self.search_wikipedia(command)
-        elif "open" in command_lower and any(domain in command_lower for domain in [".com", ".org", ".net", "www"]):
+        elif "open" in command_lower and _SITE_RE.search(command_lower):
             return self.open_website(command)
-        elif any(word in command_lower for word in ["search", "google", "find"]):
+        elif _SEARCH_RE.search(command_lower):
             return self.search_google(command)
         else:
             return "Web commands: 'search [query]', 'open [website]', 'youtube [query]', 'wikipedia [topic]'"
@@ -28,15 +58,7 @@ class WebSearchPlugin(BasePlugin):
     def extract_query(self, command: str) -> str:
         """Extract search query from command"""
         # Remove command words to get the actual query
-        remove_words = ["search", "google", "find", "youtube", "wikipedia", "wiki", "open", "for", "about"]
-        words = command.split()
-        query_words = []
-        
-        for word in words:
-            if word.lower() not in remove_words:
-                query_words.append(word)
-        
-        return " ".join(query_words).strip()
+        return " ".join(word for word in command.split() if word.lower() not in _REMOVE_WORDS)
     
     def search_google(self, command: str) -> str:
         """Search Google for a query"""
@@ -54,17 +76,16 @@ class WebSearchPlugin(BasePlugin):
             
             # Try to get first few results
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = requests.get(search_url, headers=headers, timeout=5)
-                soup = BeautifulSoup(response.text, 'html.parser')
+                response = self.session.get(search_url, timeout=5)
+                # lxml parses in C and detects the encoding from the raw bytes
+                document = lxml.html.fromstring(response.content)
                 
                 # Extract first few search result titles
                 results = []
-                for h3 in soup.find_all('h3', limit=3):
-                    if h3.text.strip():
-                        results.append(h3.text.strip())
+                for h3 in _RESULT_TITLES_XPATH(document):
+                    title = h3.text_content().strip()
+                    if title:
+                        results.append(title)
                 
                 if results:
                     result_text = f"Opened Google search for '{query}'. Top results:\n"
@@ -105,9 +126,7 @@ class WebSearchPlugin(BasePlugin):
             
             # Try to get Wikipedia summary
             try:
-                import wikipedia
-                summary = wikipedia.summary(query, sentences=2)
-                wiki_url = wikipedia.page(query).url
+                summary, wiki_url = self.wikipedia_summary(query)
                 webbrowser.open(wiki_url)
                 return f"Wikipedia: {summary}\n\nOpened full article in browser."
             except ImportError:
@@ -126,17 +145,29 @@ class WebSearchPlugin(BasePlugin):
         except Exception as e:
             return f"Error searching Wikipedia: {e}"
     
+    def wikipedia_summary(self, query: str) -> tuple:
+        """Get (summary, url) for a topic, reusing lookups up to ten minutes old"""
+        key = query.lower()
+        now = time.monotonic()
+        entry = self._wiki_cache.pop(key, None)
+        if entry is not None and entry[0] > now:
+            self._wiki_cache[key] = entry
+            return entry[1]
+        
+        import wikipedia
+        result = (wikipedia.summary(query, sentences=2), wikipedia.page(query).url)
+        
+        self._wiki_cache[key] = (now + WIKI_CACHE_TTL, result)
+        if len(self._wiki_cache) > WIKI_CACHE_SIZE:
+            del self._wiki_cache[next(iter(self._wiki_cache))]
+        return result
+    
     def open_website(self, command: str) -> str:
         """Open a specific website"""
         try:
             # Extract URL from command
-            words = command.split()
-            url = None
-            
-            for word in words:
-                if any(domain in word.lower() for domain in [".com", ".org", ".net", ".gov", ".edu"]) or word.startswith("www."):
-                    url = word
-                    break
+            match = _URL_TOKEN_RE.search(command)
+            url = match.group() if match else None
             
             if not url:
                 return "Please provide a valid website URL. Example: 'open google.com'"
@@ -18,29 +18,43 @@ import sys
 import os
 import subprocess
 import argparse
+import importlib
+import importlib.util
 from pathlib import Path
 
+# orjson parses config.json faster when it is installed; both accept bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# pip package name -> module it installs
+REQUIRED_PACKAGES = {
+    'SpeechRecognition': 'speech_recognition',
+    'pyttsx3': 'pyttsx3',
+    'pyaudio': 'pyaudio',
+    'psutil': 'psutil',
+    'beautifulsoup4': 'bs4',
+    'wikipedia': 'wikipedia',
+    'requests': 'requests',
+}
+
+def probe_package(package):
+    """Return True if the package is installed, without importing it"""
+    return importlib.util.find_spec(REQUIRED_PACKAGES[package]) is not None
+
 def check_dependencies():
     """Check if all required dependencies are installed"""
     print("🔍 Checking dependencies...")
     
-    required_packages = [
-        'speech_recognition',
-        'pyttsx3',
-        'pyaudio',
-        'psutil',
-        'beautifulsoup4',
-        'wikipedia',
-        'requests'
-    ]
-    
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
+    for package in REQUIRED_PACKAGES:
+        if probe_package(package):
             print(f"✅ {package}")
-        except ImportError:
+        else:
             print(f"❌ {package} - MISSING")
             missing_packages.append(package)
     
@@ -48,17 +62,34 @@ def check_dependencies():
         print(f"\n⚠️  Missing packages: {', '.join(missing_packages)}")
         print("Installing missing packages...")
         
-        for package in missing_packages:
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+        # One pip run resolves all of them together; only if that fails are
+        # the packages that are still missing retried one at a time
+        try:
+            subprocess.check_call([sys.executable, "-m", "pip", "install",
+                                   "--disable-pip-version-check", *missing_packages])
+            for package in missing_packages:
                 print(f"✅ Installed {package}")
-            except subprocess.CalledProcessError:
-                print(f"❌ Failed to install {package}")
-                return False
+        except subprocess.CalledProcessError:
+            importlib.invalidate_caches()
+            for package in missing_packages:
+                if probe_package(package):
+                    print(f"✅ Installed {package}")
+                    continue
+                try:
+                    subprocess.check_call([sys.executable, "-m", "pip", "install",
+                                           "--disable-pip-version-check", package])
+                    print(f"✅ Installed {package}")
+                except subprocess.CalledProcessError:
+                    print(f"❌ Failed to install {package}")
+                    return False
     
     print("✅ All dependencies are ready!")
     return True
 
+def load_config():
+    """Load config.json from the current directory"""
+    return _json_loads(Path('config.json').read_bytes())
+
 def show_banner():
     """Show startup banner"""
     print("""
@@ -111,6 +142,15 @@ def main():
     print(f"🚀 Starting Smart Assistant in {args.mode.upper()} mode...")
     
     try:
+        # Every mode except basic configures its assistant from config.json;
+        # read it once and apply the command line overrides here
+        if args.mode != 'basic':
+            config = load_config()
+            if args.no_voice:
+                config['voice']['enabled'] = False
+            if args.no_learning:
+                config['learning']['enabled'] = False
+        
         if args.mode == 'basic':
             print("📝 Starting Basic Assistant (Original)...")
             import main
@@ -122,14 +162,6 @@ def main():
             # Import and configure
             from main_pro import SmartAssistantPro
             from voice_handler import VoiceHandler
-            import json
-            
-            # Load config
-            with open('config.json', 'r') as f:
-                config = json.load(f)
-              # Override voice setting if needed
-            if args.no_voice:
-                config['voice']['enabled'] = False
             
             # Create and start assistant
             assistant = SmartAssistantPro(config)
@@ -138,10 +170,6 @@ def main():
         elif args.mode == 'voice':
             print("🎙️  Starting Voice-Only Mode...")
             from main_pro import SmartAssistantPro
-            import json
-            
-            with open('config.json', 'r') as f:
-                config = json.load(f)
             
             config['voice']['enabled'] = True
             config['ui']['show_startup_banner'] = False
@@ -151,10 +179,6 @@ def main():
         elif args.mode == 'text':
             print("💬 Starting Text-Only Mode...")
             from main_pro import SmartAssistantPro
-            import json
-            
-            with open('config.json', 'r') as f:
-                config = json.load(f)
             
             config['voice']['enabled'] = False
             
@@ -166,17 +190,6 @@ def main():
             
             # Import the learning assistant
             from main_learning import SmartAssistantProLearning
-            import json
-            
-            # Load config
-            with open('config.json', 'r') as f:
-                config = json.load(f)
-            
-            # Override settings based on command line args
-            if args.no_voice:
-                config['voice']['enabled'] = False
-            if args.no_learning:
-                config['learning']['enabled'] = False
             
             # Create and start the learning assistant
             assistant = SmartAssistantProLearning(config)
@@ -1,26 +1,78 @@
 import os
+import subprocess
+
+# Launched apps run on their own, detached from this process's console
+# (DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP; both flags exist on Windows only)
+_DETACHED_FLAGS = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+
+# Directories that never hold what the searches below look for, and can be huge
+_SKIP_DIRS = frozenset({"WindowsApps", "$Recycle.Bin", "System Volume Information",
+                        ".git", "node_modules", "__pycache__"})
+
+# search paths -> [(lowercased exe name, full path), ...] in os.walk order
+_exe_index = {}
+
+def _scan_executables(path):
+    # Same order as os.walk: a directory's files, then each subdirectory in turn
+    try:
+        with os.scandir(path) as entries:
+            entries = list(entries)
+    except OSError:
+        return
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _SKIP_DIRS:
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(".exe"):
+                yield entry.name.lower(), entry.path
+        except OSError:
+            continue
+    for subdir in subdirs:
+        yield from _scan_executables(subdir)
+
+def _build_exe_index(search_paths):
+    index = [exe for path in search_paths for exe in _scan_executables(path)]
+    _exe_index[search_paths] = index
+    return index
+
+def _lookup_executable(index, name):
+    for exe_name, exe_path in index:
+        if name in exe_name:
+            return exe_path if os.path.isfile(exe_path) else None
+    return None
 
 def find_executable(app_name, search_paths=None):
     if search_paths is None:
         search_paths = [r"C:\Program Files", r"C:\Program Files (x86)"]
+    search_paths = tuple(search_paths)
+    name = app_name.lower()
 
-    for path in search_paths:
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if app_name.lower() in file.lower() and file.endswith(".exe"):
-                    return os.path.join(root, file)
-    return None
+    index = _exe_index.get(search_paths)
+    if index is None:
+        return _lookup_executable(_build_exe_index(search_paths), name)
+
+    # Only walk the disk again when the cached listing has no match, or the
+    # match has been removed since it was taken
+    path = _lookup_executable(index, name)
+    if path is None:
+        path = _lookup_executable(_build_exe_index(search_paths), name)
+    return path
 
 def open_found_app(app_name):
     path = find_executable(app_name)
     if path:
-        os.system(f'start "" "{path}"')
+        subprocess.Popen([path], creationflags=_DETACHED_FLAGS, close_fds=True,
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL)
         return f"Opening {app_name}..."
     else:
         return f"Could not find {app_name}."
 
 def find_file(filename, search_path="."):
     for root, dirs, files in os.walk(search_path):
+        dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
         if filename in files:
             return os.path.join(root, filename)
     return None
@@ -1,25 +1,35 @@
 #!/usr/bin/env python3
 """Simple verification test for plugins."""
 
+import importlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append('.')
 
+# (label, module) for each plugin to check
+PLUGINS = [
+    ("Web Search", "plugins.enhanced_websearch"),
+    ("Desktop", "plugins.advanced_desktop"),
+]
+
+def load_plugin(module_name):
+    return importlib.import_module(module_name).create_plugin()
+
 try:
     print("Testing plugin imports...")
     
-    # Test enhanced websearch plugin
-    from plugins.enhanced_websearch import create_plugin as create_web
-    web_plugin = create_web()
-    print(f"✅ Web Search Plugin: {web_plugin.name}")
+    # Import the plugins side by side so their heavy dependencies load in
+    # parallel; results are reported in the order above
+    with ThreadPoolExecutor(max_workers=len(PLUGINS)) as executor:
+        futures = [executor.submit(load_plugin, module) for _, module in PLUGINS]
+    plugins = [future.result() for future in futures]
     
-    # Test advanced desktop plugin  
-    from plugins.advanced_desktop import create_plugin as create_desktop
-    desktop_plugin = create_desktop()
-    print(f"✅ Desktop Plugin: {desktop_plugin.name}")
+    for (label, _), plugin in zip(PLUGINS, plugins):
+        print(f"✅ {label} Plugin: {plugin.name}")
     
     # Test handle_command methods
-    print(f"✅ Web Search has handle_command: {hasattr(web_plugin, 'handle_command')}")
-    print(f"✅ Desktop has handle_command: {hasattr(desktop_plugin, 'handle_command')}")
+    for (label, _), plugin in zip(PLUGINS, plugins):
+        print(f"✅ {label} has handle_command: {hasattr(plugin, 'handle_command')}")
     
     print("\n🎉 All plugins imported successfully!")
     print("🚀 Ready for GitHub upload!")
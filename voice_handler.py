@@ -1,18 +1,99 @@
-import speech_recognition as sr
-import pyttsx3
+import atexit
+import json
+import queue
+import re
 import threading
 import time
 from typing import Optional, Callable
 
+# speech_recognition and pyttsx3 pull in PyAudio and the platform TTS stack,
+# so they are only imported once a VoiceHandler is created; text-only runs
+# that import this module never load them
+sr = None
+pyttsx3 = None
+
+def _import_voice_modules():
+    """Import speech_recognition and pyttsx3 on first use."""
+    global sr, pyttsx3
+    if sr is None or pyttsx3 is None:
+        import speech_recognition as sr
+        import pyttsx3
+
 class VoiceHandler:
-    def __init__(self):
+    def __init__(self, offline_model_path: Optional[str] = None):
+        _import_voice_modules()
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
-        self.tts_engine = pyttsx3.init()
         self.listening = False
-        self.setup_tts()
+        
+        # On-device recognition with a Vosk model when one is configured;
+        # otherwise every utterance goes to Google's web API
+        self.vosk_model = self.load_vosk_model(offline_model_path) if offline_model_path else None
+        
+        # Speech is queued and spoken on a worker thread so callers don't block
+        # for the length of each utterance
+        self._tts_queue = queue.Queue()
+        self._tts_ready = threading.Event()
+        self._tts_error = None
+        threading.Thread(target=self._tts_worker, name="tts", daemon=True).start()
+        self._tts_ready.wait()
+        if self._tts_error is not None:
+            raise self._tts_error
+        # The worker is a daemon thread, so let queued replies finish at exit
+        atexit.register(self.flush_tts)
+        
         self.calibrate_microphone()
     
+    def _tts_worker(self):
+        """Own the TTS engine and speak queued text in order"""
+        # The engine is created here because SAPI5's COM objects have to be
+        # used from the thread that created them
+        try:
+            self.tts_engine = pyttsx3.init()
+            self.setup_tts()
+        except Exception as e:
+            self._tts_error = e
+            return
+        finally:
+            self._tts_ready.set()
+        
+        while True:
+            text = self._tts_queue.get()
+            try:
+                self.tts_engine.say(text)
+                self.tts_engine.runAndWait()
+            except Exception as e:
+                print(f"TTS error: {e}")
+            finally:
+                self._tts_queue.task_done()
+    
+    def load_vosk_model(self, model_path: str):
+        """Load a Vosk model for offline recognition, or return None"""
+        try:
+            import vosk
+            vosk.SetLogLevel(-1)
+            model = vosk.Model(model_path)
+            print(f"Offline speech recognition enabled ({model_path})")
+            return model
+        except ImportError:
+            print("vosk is not installed; using Google speech recognition")
+        except Exception as e:
+            print(f"Could not load Vosk model '{model_path}': {e}; using Google speech recognition")
+        return None
+    
+    def transcribe(self, audio) -> str:
+        """Turn captured audio into text, raising sr.UnknownValueError if nothing was understood"""
+        if self.vosk_model is None:
+            return self.recognizer.recognize_google(audio)
+        
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self.vosk_model, 16000)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+    
     def setup_tts(self):
         """Configure text-to-speech settings"""
         voices = self.tts_engine.getProperty('voices')
@@ -33,23 +114,31 @@ class VoiceHandler:
             print(f"Microphone calibration failed: {e}")
     
     def speak(self, text: str):
-        """Convert text to speech"""
-        try:
-            print(f"Speaking: {text}")
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-        except Exception as e:
-            print(f"TTS error: {e}")
+        """Queue text to be spoken and return immediately"""
+        print(f"Speaking: {text}")
+        self._tts_queue.put(text)
+    
+    def flush_tts(self):
+        """Wait until everything queued with speak() has been spoken"""
+        self._tts_queue.join()
     
-    def listen_once(self, timeout: int = 5) -> Optional[str]:
-        """Listen for a single voice command"""
+    def listen_once(self, timeout: int = 5, source=None) -> Optional[str]:
+        """Listen for a single voice command.
+        
+        Pass an already opened microphone as source to avoid reopening the device.
+        """
         try:
+            # Don't record our own speech
+            self.flush_tts()
             print("Listening...")
-            with self.microphone as source:
+            if source is None:
+                with self.microphone as source:
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
+            else:
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
             
             print("Processing speech...")
-            text = self.recognizer.recognize_google(audio)
+            text = self.transcribe(audio)
             print(f"Heard: {text}")
             return text
             
@@ -71,28 +160,38 @@ class VoiceHandler:
         print(f"Listening continuously for wake word: '{wake_word}'")
         self.listening = True
         
-        while self.listening:
-            try:
-                with self.microphone as source:
-                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                
-                text = self.recognizer.recognize_google(audio).lower()
-                print(f"Heard: {text}")
-                
-                if wake_word.lower() in text:
-                    self.speak("Yes, how can I help you?")
-                    command = self.listen_once(timeout=10)
-                    if command:
-                        callback(command)
-                
-            except (sr.UnknownValueError, sr.WaitTimeoutError):
-                continue
-            except sr.RequestError as e:
-                print(f"Speech recognition error: {e}")
-                time.sleep(1)
-            except Exception as e:
-                print(f"Unexpected error in continuous listening: {e}")
-                time.sleep(1)
+        # Whole words only, so "assistants" or "assistantship" don't wake it
+        wake_re = re.compile(rf"(?<!\w){re.escape(wake_word.lower())}(?!\w)")
+        
+        # The microphone stays open for the whole session rather than being
+        # reopened (and the audio device renegotiated) on every short listen
+        try:
+            with self.microphone as source:
+                while self.listening:
+                    try:
+                        self.flush_tts()
+                        audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=3)
+                        
+                        text = self.transcribe(audio).lower()
+                        print(f"Heard: {text}")
+                        
+                        if wake_re.search(text):
+                            self.speak("Yes, how can I help you?")
+                            command = self.listen_once(timeout=10, source=source)
+                            if command:
+                                callback(command)
+                        
+                    except (sr.UnknownValueError, sr.WaitTimeoutError):
+                        continue
+                    except sr.RequestError as e:
+                        print(f"Speech recognition error: {e}")
+                        time.sleep(1)
+                    except Exception as e:
+                        print(f"Unexpected error in continuous listening: {e}")
+                        time.sleep(1)
+        except Exception as e:
+            print(f"Could not open microphone for continuous listening: {e}")
+            self.listening = False
     
     def start_listening_background(self, callback: Callable[[str], None], wake_word: str = "assistant"):
         """Start continuous listening in background thread"""
@@ -104,6 +203,7 @@ class VoiceHandler:
     def stop_listening(self):
         """Stop continuous listening"""
         self.listening = False
+        self.flush_tts()
         print("Voice listening stopped.")
     
     def test_voice_system(self):